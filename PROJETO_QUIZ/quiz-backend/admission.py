@@ -0,0 +1,74 @@
+# admission.py
+# Controle de admissão do caminho WebSocket: limites de salas por worker e de jogadores por sala na
+# entrada, e por conexão um tamanho máximo de frame e um balde de fichas (token bucket) de mensagens.
+# As verificações de frame vêm antes do json.loads: um cliente abusivo custa uma comparação, não um parse.
+# Elas só rodam depois que o servidor ASGI já montou o frame inteiro; quem limita esse buffer é o
+# ws_max_size do uvicorn, que deve ser iniciado com WS_MAX_SIZE (ver o fim de main.py).
+import os
+import time
+from typing import Dict, Optional
+
+MAX_ROOMS = int(os.environ.get("QUIZ_MAX_ROOMS", "2000"))
+MAX_PLAYERS_PER_ROOM = int(os.environ.get("QUIZ_MAX_PLAYERS_PER_ROOM", "12"))
+# Em caracteres do texto recebido; as mensagens legítimas do cliente têm poucas centenas.
+MAX_FRAME_SIZE = int(os.environ.get("QUIZ_MAX_FRAME_SIZE", "2048"))
+# Em bytes, para o ws_max_size do uvicorn (padrão de 16 MB): cabe qualquer frame de até MAX_FRAME_SIZE
+# caracteres em UTF-8, e frames maiores nem chegam a ser montados (o uvicorn fecha com 1009).
+WS_MAX_SIZE = MAX_FRAME_SIZE * 4
+# Mensagens por segundo em regime e rajada máxima, por conexão.
+MESSAGE_RATE = float(os.environ.get("QUIZ_MESSAGE_RATE", "5"))
+MESSAGE_BURST = int(os.environ.get("QUIZ_MESSAGE_BURST", "10"))
+# Frames rejeitados tolerados numa conexão antes de fechá-la.
+MAX_STRIKES = int(os.environ.get("QUIZ_MAX_STRIKES", "20"))
+
+REASONS = ("rooms_full", "room_full", "frame_too_large", "rate_limited", "bad_message", "closed")
+# Códigos de fechamento: 1008 (violação de política), 1009 (mensagem grande demais), 1013 (tente mais tarde).
+CLOSE_CODES = {"rooms_full": 1013, "room_full": 1013, "frame_too_large": 1009, "closed": 1008}
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "strikes")
+    def __init__(self):
+        self.tokens, self.updated, self.strikes = float(MESSAGE_BURST), time.monotonic(), 0
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(MESSAGE_BURST, self.tokens + (now - self.updated) * MESSAGE_RATE)
+        self.updated = now
+        if self.tokens < 1: return False
+        self.tokens -= 1
+        return True
+
+class Admission:
+    def __init__(self):
+        self.rejected: Dict[str, int] = dict.fromkeys(REASONS, 0)
+
+    def reject(self, reason: str) -> str:
+        self.rejected[reason] += 1
+        return reason
+
+    def admit(self, active_rooms: int, new_room: bool, occupied: int, member: bool) -> Optional[str]:
+        # Quem já ocupa um lugar (reconexão) sempre entra; lugares de jogadores ausentes contam como ocupados.
+        if member: return None
+        if new_room and active_rooms >= MAX_ROOMS: return self.reject("rooms_full")
+        if occupied >= MAX_PLAYERS_PER_ROOM: return self.reject("room_full")
+        return None
+
+    def check_frame(self, bucket: TokenBucket, text: str) -> Optional[str]:
+        # Motivo da rejeição do frame, ou None se ele pode ser interpretado.
+        if len(text) > MAX_FRAME_SIZE: return self.reject("frame_too_large")
+        if not bucket.take(): return self.reject("rate_limited")
+        return None
+
+    def strike(self, bucket: TokenBucket) -> bool:
+        # Conta um frame rejeitado; True quando a conexão deve ser fechada.
+        bucket.strikes += 1
+        if bucket.strikes < MAX_STRIKES: return False
+        self.reject("closed")
+        return True
+
+    def stats(self) -> Dict:
+        return {"rejected": dict(self.rejected),
+                "limits": {"rooms": MAX_ROOMS, "players_per_room": MAX_PLAYERS_PER_ROOM, "frame_size": MAX_FRAME_SIZE, "ws_max_size": WS_MAX_SIZE,
+                           "message_rate": MESSAGE_RATE, "message_burst": MESSAGE_BURST}}
+
+admission = Admission()
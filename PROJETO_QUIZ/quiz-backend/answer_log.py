@@ -0,0 +1,30 @@
+# answer_log.py
+# Log de respostas para análise por pergunta: a jogada só acrescenta uma tupla a um buffer em memória;
+# uma task grava os eventos em lote, junto com os agregados (acertos, tempos) de cada pergunta.
+import time
+from typing import List, Tuple
+import database
+from batch_writer import BatchWriter
+
+AnswerEvent = Tuple[float, str, str, str, int, str, int, int, int]
+
+class AnswerLog(BatchWriter):
+    pending_type = list
+    label = "respostas"
+
+    def __init__(self, flush_interval: float = 2.0, max_pending: int = 2000):
+        super().__init__(flush_interval, max_pending)
+
+    def record(self, room_id: str, player_name: str, source: str, question_key: int, difficulty: str,
+               correct: bool, timed_out: bool, response_seconds: float):
+        self.pending.append((time.time(), room_id, player_name, source, question_key, difficulty,
+                             int(correct), int(timed_out), max(0, int(response_seconds * 1000))))
+        self.wake_if_full()
+
+    async def write(self, batch: List[AnswerEvent]):
+        await database.run_write(database.add_answer_events, batch)
+
+    def restore(self, batch: List[AnswerEvent]):
+        self.pending[:0] = batch
+
+answer_log = AnswerLog()
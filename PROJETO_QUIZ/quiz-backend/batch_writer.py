@@ -0,0 +1,67 @@
+# batch_writer.py
+# Base dos gravadores write-behind (ScoreSink, QuestionHistory, AnswerLog): as jogadas só acumulam em
+# `pending`, e uma task grava o acumulado a cada flush_interval, ou antes, quando passa de max_pending.
+# Cada subclasse só define como gravar um lote (write) e como devolvê-lo a `pending` se a gravação falhar.
+import asyncio
+from typing import Any
+
+class BatchWriter:
+    # Tipo de `pending` (dict ou list) e o que é gravado, para as mensagens de erro.
+    pending_type = dict
+    label = "lote"
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval, self.max_pending = flush_interval, max_pending
+        self.pending = self.pending_type()
+        self.flushes = self.rows_written = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    async def write(self, batch) -> Any:
+        raise NotImplementedError
+
+    def restore(self, batch):
+        raise NotImplementedError
+
+    def written(self, batch, result: Any):
+        # Chamado depois de um lote gravado, com o retorno de write().
+        pass
+
+    def wake_if_full(self):
+        if len(self.pending) >= self.max_pending: self._wake.set()
+
+    async def flush(self):
+        if not self.pending: return
+        batch, self.pending = self.pending, self.pending_type()
+        try:
+            result = await self.write(batch)
+        except Exception:
+            # Devolve o lote para a próxima tentativa sem perder o que chegou nesse meio tempo.
+            self.restore(batch)
+            raise
+        self.flushes += 1
+        self.rows_written += len(batch)
+        self.written(batch, result)
+
+    def stats(self):
+        return {"pending": len(self.pending), "flushes": self.flushes, "rows_written": self.rows_written}
+
+    def start(self):
+        if self._task is None: self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try: await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError: pass
+            self._wake.clear()
+            try: await self.flush()
+            except Exception as e: print(f"Erro ao gravar {self.label}: {e}")
+
+    async def close(self):
+        # Flush final no desligamento: nada fica só em memória.
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+        await self.flush()
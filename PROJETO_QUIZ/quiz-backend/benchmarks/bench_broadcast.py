@@ -0,0 +1,89 @@
+# Micro-benchmark do broadcast por sala: laço sequencial antigo vs. fan-out com filas por conexão.
+# Uso: python benchmarks/bench_broadcast.py [--rounds 200]
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+class FakeWebSocket:
+    # Simula a latência de envio de um cliente real (rede + buffer do kernel).
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+        self.done = None
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        self.received += 1
+        if self.done and self.received >= self.done[0]: self.done[1].set()
+    async def close(self, code: int = 1000): pass
+
+async def legacy_broadcast(sockets, message):
+    for connection in sockets: await connection.send_text(json.dumps(message))
+
+def sample_message(players: int):
+    question = main.bank.get(random.choice(main.bank.defaults.ids)).public
+    return {"type": "gameStateUpdate", "state": {
+        "players": {f"p{i}": {"name": f"p{i}"} for i in range(players)},
+        "scores": {f"p{i}": random.randint(0, 90) for i in range(players)},
+        "current_question": question, "current_player_index": 0, "timeRemaining": 30}}
+
+async def run_legacy(players: int, latency: float, rounds: int):
+    sockets = [FakeWebSocket(latency) for _ in range(players)]
+    samples = []
+    for _ in range(rounds):
+        message = sample_message(players)
+        start = time.perf_counter()
+        await legacy_broadcast(sockets, message)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+async def run_fanout(players: int, latency: float, rounds: int):
+    room_id = "bench"
+    manager = main.ConnectionManager()
+    main.game_states[room_id] = main.Room(room_id, "bench")
+    sockets = [FakeWebSocket(latency) for _ in range(players)]
+    manager.rooms[room_id] = {f"p{i}": main.Connection(ws) for i, ws in enumerate(sockets)}
+    samples = []
+    for n in range(1, rounds + 1):
+        message = sample_message(players)
+        events = []
+        for ws in sockets:
+            ws.done = (n, asyncio.Event())
+            events.append(ws.done[1])
+        start = time.perf_counter()
+        await manager.broadcast(room_id, message)
+        await asyncio.gather(*(event.wait() for event in events))
+        samples.append(time.perf_counter() - start)
+    for connection in manager.rooms[room_id].values(): connection.close()
+    del main.game_states[room_id]
+    return samples
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {"p50_ms": round(statistics.median(samples) * 1000, 3),
+            "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3)}
+
+async def bench(args):
+    results = []
+    for players in args.players:
+        legacy = summarize(await run_legacy(players, args.latency, args.rounds))
+        fanout = summarize(await run_fanout(players, args.latency, args.rounds))
+        results.append({"players": players, "legacy": legacy, "fanout": fanout})
+        print(f"{players:>3} jogadores | antigo p50={legacy['p50_ms']:>8}ms p99={legacy['p99_ms']:>8}ms"
+              f" | fan-out p50={fanout['p50_ms']:>8}ms p99={fanout['p99_ms']:>8}ms")
+    if args.json: print(json.dumps(results))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 4, 8, 16, 32])
+    parser.add_argument("--latency", type=float, default=0.002, help="latência média de send_text, em segundos")
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(bench(parser.parse_args()))
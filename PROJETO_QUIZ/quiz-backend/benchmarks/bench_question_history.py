@@ -0,0 +1,86 @@
+# Micro-benchmark da seleção de perguntas inéditas: união dos bitsets dos jogadores + montagem do
+# baralho vs. conjuntos de ids por jogador e varredura da lista do banco.
+# Uso: python benchmarks/bench_question_history.py [--questions 10000] [--players 10] [--seen 0.3]
+import argparse
+import functools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bitset
+from question_bank import QuestionBank
+
+def build_bank(size: int) -> QuestionBank:
+    bank = QuestionBank(path=os.devnull)
+    bank.load_defaults([{"id": n, "question": f"Pergunta {n}?", "options": [f"a{n}", f"b{n}", f"c{n}", f"d{n}"],
+                         "correctAnswer": f"a{n}", "difficulty": random.choice(("Fácil", "Médio", "Difícil"))} for n in range(size)])
+    return bank
+
+def naive_select(bank: QuestionBank, histories):
+    # Como seria sem bitsets: um set de ids vistos por jogador, unidos e testados item a item.
+    seen = set()
+    for history in histories: seen |= history
+    ids = bank.defaults.ids
+    return [i for i in ids if i in seen], [i for i in ids if i not in seen]
+
+def naive_deck(bank: QuestionBank, histories):
+    stale, fresh = naive_select(bank, histories)
+    random.shuffle(stale)
+    random.shuffle(fresh)
+    return stale + fresh
+
+def bitset_select(bank: QuestionBank, histories):
+    return bitset.partition(bank.defaults.slots, functools.reduce(int.__or__, histories))
+
+def bitset_deck(bank: QuestionBank, histories):
+    return bank.new_deck((), (functools.reduce(int.__or__, histories), set()))
+
+def timed(fn, *args, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples) * 1000, 3), "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3)}
+
+def bench(args):
+    bank = build_bank(args.questions)
+    keys = bank.defaults.keys
+    sets = [set(random.sample(bank.defaults.ids, int(args.questions * args.seen))) for _ in range(args.players)]
+    bits = []
+    for history in sets:
+        value = 0
+        for question_id in history: value |= 1 << keys[question_id]
+        bits.append(value)
+    # Mesmo resultado nas duas versões: as inéditas ficam no fim do baralho.
+    fresh = bank.defaults.mask & ~functools.reduce(int.__or__, bits)
+    deck = bitset_deck(bank, bits)
+    assert sorted(deck[len(deck) - bin(fresh).count("1"):]) == sorted(i for i in bank.defaults.ids if not any(i in s for s in sets))
+    assert bitset_select(bank, bits) == naive_select(bank, sets)
+    result = {
+        "questions": args.questions, "players": args.players, "seen_fraction": args.seen,
+        "select": {"set": timed(naive_select, bank, sets, rounds=args.rounds), "bitset": timed(bitset_select, bank, bits, rounds=args.rounds)},
+        "deck": {"set": timed(naive_deck, bank, sets, rounds=args.rounds), "bitset": timed(bitset_deck, bank, bits, rounds=args.rounds)},
+        "union": {"set": timed(lambda: set().union(*sets), rounds=args.rounds), "bitset": timed(functools.reduce, int.__or__, bits, rounds=args.rounds)},
+        "bytes_per_player": {"set": sum(sys.getsizeof(s) + 28 * len(s) for s in sets) // len(sets),
+                             "bitset": sum(len(bitset.to_blob(b)) for b in bits) // len(bits)},
+    }
+    print(f"{args.questions} perguntas, {args.players} jogadores, {args.seen:.0%} vistas por jogador")
+    for kind, label in (("set", "sets"), ("bitset", "bitsets")):
+        print(f"  {label:<8} união p50={result['union'][kind]['p50_ms']:>7}ms | seleção p50={result['select'][kind]['p50_ms']:>7}ms"
+              f" | baralho embaralhado p50={result['deck'][kind]['p50_ms']:>7}ms | {result['bytes_per_player'][kind]:>7} bytes/jogador")
+    if args.json: print(json.dumps(result))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--seen", type=float, default=0.3, help="fração do banco já vista por cada jogador")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--json", action="store_true")
+    bench(parser.parse_args())
@@ -0,0 +1,69 @@
+# Benchmark de gravação do ranking: update_player_score por jogador (antigo) vs. ScoreSink em lote.
+# Uso: python benchmarks/bench_score_writes.py [--games 2000] [--players 4] [--hosts 50]
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+from score_sink import ScoreSink
+
+def game_results(args):
+    rng = random.Random(42)
+    for _ in range(args.games):
+        host = f"host{rng.randrange(args.hosts)}"
+        yield host, {f"player{rng.randrange(args.hosts * 4)}": rng.randrange(10, 110, 10) for _ in range(args.players)}
+
+def bench_legacy(args):
+    commits, start = 0, time.perf_counter()
+    for host, scores in game_results(args):
+        for player, score in scores.items():
+            database.update_player_score(player, score, host)
+            commits += 1
+    return commits, time.perf_counter() - start
+
+async def bench_sink(args):
+    sink = ScoreSink(flush_interval=args.flush_interval)
+    sink.start()
+    start = time.perf_counter()
+    for n, (host, scores) in enumerate(game_results(args)):
+        sink.add(host, scores)
+        # Espalha os fins de jogo no tempo, como num servidor real.
+        if n % args.games_per_tick == 0: await asyncio.sleep(0.001)
+    await sink.close()
+    return sink.flushes, time.perf_counter() - start
+
+def main(args):
+    results = {}
+    database.DATABASE_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+    database.init_db()
+    for name in ("legacy", "sink"):
+        with database.pooled_connection() as conn:
+            conn.execute("DELETE FROM ranking")
+            conn.commit()
+        if name == "legacy":
+            commits, elapsed = bench_legacy(args)
+        else:
+            commits, elapsed = asyncio.run(bench_sink(args))
+        results[name] = {"commits": commits, "seconds": round(elapsed, 3),
+                         "games_per_second": round(args.games / elapsed, 1),
+                         "commits_per_second": round(commits / elapsed, 1)}
+    database.close_pool()
+    for name, r in results.items():
+        print(f"{name:>6}: {r['commits']:>6} commits em {r['seconds']}s | {r['commits_per_second']} commits/s | {r['games_per_second']} jogos/s")
+    if args.json: print(json.dumps(results))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--flush-interval", type=float, default=0.25)
+    parser.add_argument("--games-per-tick", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    main(parser.parse_args())
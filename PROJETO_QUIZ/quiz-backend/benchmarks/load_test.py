@@ -0,0 +1,175 @@
+# Gerador de carga para /ws/{room_id}/{client_id}: várias salas e jogadores simulados contra um servidor local.
+# Mede o atraso entre o next_turn do servidor e a chegada da atualização no cliente (p50/p95/p99),
+# turnos por segundo, latência de escrita no banco e memória por sala (via GET /stats).
+#
+# Uso:
+#   python benchmarks/load_test.py --spawn --rooms 50 --players 4 --duration 30 --json resultado.json
+#   python benchmarks/load_test.py --url ws://127.0.0.1:8000 ...   (servidor iniciado com QUIZ_TRACE_TIMESTAMPS=1)
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from admission import WS_MAX_SIZE
+
+class Results:
+    def __init__(self):
+        self.turn_delays = []
+        self.turns = 0
+        self.games = 0
+        self.connects = self.disconnects = self.errors = 0
+
+def apply_patch(state, ops):
+    for op in ops:
+        keys = [k.replace("~1", "/").replace("~0", "~") for k in op["path"].split("/")[1:]]
+        node = state
+        for key in keys[:-1]: node = node.setdefault(key, {})
+        if op["op"] == "remove": node.pop(keys[-1], None)
+        else: node[keys[-1]] = op["value"]
+
+async def player(args, base_url, room_id, name, observer, results, deadline):
+    rng = random.Random(f"{room_id}/{name}")
+    state, last_seq = {}, 0
+    while time.time() < deadline:
+        query = "?delta=1" if args.delta else ""
+        if args.resume and last_seq: query += f"&since={last_seq}"
+        elif not args.resume: state, last_seq = {}, 0
+        try:
+            async with websockets.connect(f"{base_url}/ws/{room_id}/{name}{query}", max_size=None) as ws:
+                results.connects += 1
+                leave_at = time.time() + rng.expovariate(args.disconnect_rate) if args.disconnect_rate > 0 else deadline
+                while time.time() < min(deadline, leave_at):
+                    try: raw = await asyncio.wait_for(ws.recv(), timeout=min(deadline, leave_at) - time.time())
+                    except asyncio.TimeoutError: break
+                    received_at = time.time()
+                    message = json.loads(raw)
+                    if message["type"] == "gameOver":
+                        if observer: results.games += 1
+                        state, last_seq = {}, 0
+                        break
+                    if message["type"] == "gameStateUpdate": state = message["state"]
+                    elif message["type"] == "gameStatePatch":
+                        if message["baseSeq"] != last_seq:
+                            await ws.send(json.dumps({"type": "requestSnapshot"}))
+                            continue
+                        apply_patch(state, message["ops"])
+                    else: continue
+                    last_seq = message["seq"]
+                    if "ts" in message:
+                        results.turn_delays.append(received_at - message["ts"])
+                        if observer: results.turns += 1
+                    players = list(state.get("players", {}))
+                    question = state.get("current_question")
+                    if question and players and players[state["current_player_index"]] == name and "ts" in message:
+                        await asyncio.sleep(rng.uniform(*args.answer_delay))
+                        correct = rng.random() < args.correct_rate
+                        answer = question["correctAnswer"] if correct else next(o for o in question["options"] if o != question["correctAnswer"])
+                        await ws.send(json.dumps({"type": "submitAnswer", "answer": answer}))
+            results.disconnects += 1
+        except (OSError, websockets.ConnectionClosed):
+            results.errors += 1
+        await asyncio.sleep(rng.uniform(*args.reconnect_delay))
+
+def fetch_stats(http_url):
+    with urllib.request.urlopen(f"{http_url}/stats", timeout=5) as response: return json.load(response)
+
+def percentile(samples, p):
+    if not samples: return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+def spawn_server(port):
+    workdir = tempfile.mkdtemp(prefix="quiz-load-")
+    env = {**os.environ, "QUIZ_TRACE_TIMESTAMPS": "1"}
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR, "--port", str(port), "--log-level", "warning",
+                                "--ws-max-size", str(WS_MAX_SIZE)],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            fetch_stats(f"http://127.0.0.1:{port}")
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("O servidor não respondeu a tempo.")
+
+async def run(args):
+    base_url = args.url.rstrip("/")
+    http_url = base_url.replace("ws://", "http://").replace("wss://", "https://")
+    before = fetch_stats(http_url)
+    results = Results()
+    deadline = time.time() + args.duration
+    tasks = [player(args, base_url, f"{args.prefix}{room}", f"p{n}", n == 0, results, deadline)
+             for room in range(args.rooms) for n in range(args.players)]
+    sampler_peak = {"rss_bytes": before["rss_bytes"], "rooms": 0}
+    async def sample():
+        while time.time() < deadline:
+            await asyncio.sleep(1)
+            stats = await asyncio.to_thread(fetch_stats, http_url)
+            if stats["rooms"] >= sampler_peak["rooms"]: sampler_peak.update(rss_bytes=stats["rss_bytes"], rooms=stats["rooms"])
+    started = time.time()
+    await asyncio.gather(sample(), *tasks)
+    elapsed = time.time() - started
+    await asyncio.sleep(args.flush_wait)
+    after = fetch_stats(http_url)
+    writes = after["db_writes"]["count"] - before["db_writes"]["count"]
+    write_seconds = after["db_writes"]["seconds_total"] - before["db_writes"]["seconds_total"]
+    delays_ms = [d * 1000 for d in results.turn_delays]
+    return {
+        "config": vars(args),
+        "turn_delay_ms": {"p50": percentile(delays_ms, 50), "p95": percentile(delays_ms, 95), "p99": percentile(delays_ms, 99),
+                          "mean": statistics.fmean(delays_ms) if delays_ms else None, "samples": len(delays_ms)},
+        "turns_per_second": results.turns / elapsed,
+        "games": results.games,
+        "connections": {"connects": results.connects, "disconnects": results.disconnects, "errors": results.errors},
+        "db_write_ms": {"count": writes, "mean": write_seconds / writes * 1000 if writes else None,
+                        "max": after["db_writes"]["seconds_max"] * 1000},
+        "memory": {"rss_before_bytes": before["rss_bytes"], "rss_peak_bytes": sampler_peak["rss_bytes"], "peak_rooms": sampler_peak["rooms"],
+                   "bytes_per_room": (sampler_peak["rss_bytes"] - before["rss_bytes"]) / sampler_peak["rooms"] if sampler_peak["rooms"] else None},
+        "server": after,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="ws://127.0.0.1:8765")
+    parser.add_argument("--spawn", action="store_true", help="inicia um servidor uvicorn temporário em --url")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--answer-delay", type=float, nargs=2, default=[0.2, 1.5], metavar=("MIN", "MAX"))
+    parser.add_argument("--correct-rate", type=float, default=0.7)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="desconexões por jogador por segundo (Poisson)")
+    parser.add_argument("--reconnect-delay", type=float, nargs=2, default=[0.1, 1.0], metavar=("MIN", "MAX"))
+    parser.add_argument("--delta", action="store_true", help="conecta com ?delta=1")
+    parser.add_argument("--resume", action="store_true", help="com --delta, reconecta com ?since=<último seq> e mantém o estado")
+    parser.add_argument("--prefix", default="carga-")
+    parser.add_argument("--flush-wait", type=float, default=1.5)
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args()
+    server = spawn_server(int(args.url.rsplit(":", 1)[1])) if args.spawn else None
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    delays = result["turn_delay_ms"]
+    print(f"atraso next_turn -> cliente: p50={delays['p50']:.2f}ms p95={delays['p95']:.2f}ms p99={delays['p99']:.2f}ms ({delays['samples']} amostras)"
+          if delays["samples"] else "nenhuma atualização com 'ts' recebida (servidor sem QUIZ_TRACE_TIMESTAMPS=1?)")
+    print(f"turnos/s={result['turns_per_second']:.1f} jogos={result['games']} escritas no banco={result['db_write_ms']['count']}"
+          f" memória/sala={result['memory']['bytes_per_room']}")
+    if args.json:
+        with open(args.json, "w") as f: json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
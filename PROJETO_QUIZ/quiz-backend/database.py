@@ -1,16 +1,82 @@
 # database.py
+import asyncio
+import operator
+import queue
+import re
 import sqlite3
-from typing import Dict, List
+import time
+import bitset
+import metrics
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from question_bank import shuffled_options
+from typing import Dict, List, Optional, Tuple
 
 DATABASE_FILE = "ranking.db"
+POOL_SIZE = 4
+
+# Conexões de longa duração reaproveitadas entre chamadas (WAL permite leitores concorrentes).
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=POOL_SIZE + 1)
+# Leituras rodam em paralelo; escritas passam por uma única thread, sem disputa pelo lock do SQLite.
+_reader = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="db-read")
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
 
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE_FILE)
+    conn = sqlite3.connect(DATABASE_FILE, timeout=10, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.create_function("blob_or", 2, bitset.blob_or, deterministic=True)
+    conn.create_function("ids_union", 2, bitset.ids_union, deterministic=True)
+    conn.create_function("histogram_add", 2, histogram_add, deterministic=True)
     return conn
 
+@contextmanager
+def pooled_connection():
+    try: conn = _pool.get_nowait()
+    except queue.Empty: conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction: conn.rollback()
+        try: _pool.put_nowait(conn)
+        except queue.Full: conn.close()
+
+async def run_read(fn, *args):
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_reader, fn, *args)
+    finally:
+        metrics.sqlite_read_seconds.observe(time.perf_counter() - started)
+
+# Latência das escritas vista por quem aguarda (fila da thread de escrita + execução).
+write_stats = {"count": 0, "seconds_total": 0.0, "seconds_max": 0.0}
+
+async def run_write(fn, *args):
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_writer, fn, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.sqlite_write_seconds.observe(elapsed)
+        write_stats["count"] += 1
+        write_stats["seconds_total"] += elapsed
+        write_stats["seconds_max"] = max(write_stats["seconds_max"], elapsed)
+
+def close_pool():
+    _writer.shutdown(wait=True)
+    _reader.shutdown(wait=True)
+    while True:
+        try: _pool.get_nowait().close()
+        except queue.Empty: break
+
 def init_db():
-    conn = get_db_connection()
+    with pooled_connection() as conn:
+        _create_schema(conn)
+    print("Banco de dados 'ranking.db' inicializado com sucesso.")
+
+def _create_schema(conn: sqlite3.Connection):
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS ranking (
@@ -21,6 +87,10 @@ def init_db():
             UNIQUE(player_name, host_name)
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ranking_host_score ON ranking (host_name, total_score DESC)")
+    # Versão do ranking de cada anfitrião, incrementada na mesma transação de cada lote de pontuações:
+    # quem tem uma cópia em memória sabe quais deltas ela já inclui (ver leaderboard.py).
+    cursor.execute("CREATE TABLE IF NOT EXISTS ranking_versions (host_name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS custom_questions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,12 +103,118 @@ def init_db():
             created_by TEXT NOT NULL 
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_custom_questions_difficulty ON custom_questions (difficulty)")
+    # Serve também às consultas só por autor (prefixo created_by).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_custom_questions_author_difficulty ON custom_questions (created_by, difficulty)")
+    # Perguntas já vistas por jogador: padrão como bitset, personalizadas como lista de ids (ver question_history.py).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS question_history (
+            player_name TEXT PRIMARY KEY,
+            seen_default BLOB,
+            seen_custom_ids BLOB
+        )
+    """)
+    # Log de respostas (só acréscimos) e agregados por pergunta, atualizados a cada lote gravado.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS answer_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            answered_at REAL NOT NULL,
+            room_id TEXT NOT NULL,
+            player_name TEXT NOT NULL,
+            source TEXT NOT NULL,
+            question_key INTEGER NOT NULL,
+            difficulty TEXT NOT NULL,
+            correct INTEGER NOT NULL,
+            timed_out INTEGER NOT NULL,
+            response_ms INTEGER NOT NULL
+        )
+    """)
+    # Agregados por pergunta e por dificuldade; response_histogram conta as respostas por faixa de
+    # ANSWER_BUCKET_MS (um array de uint32), de onde sai a mediana sem reler os eventos.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS answer_stats (
+            source TEXT NOT NULL,
+            question_key INTEGER NOT NULL,
+            difficulty TEXT NOT NULL,
+            answers INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            timeouts INTEGER NOT NULL,
+            response_histogram BLOB NOT NULL,
+            PRIMARY KEY (source, question_key)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS answer_difficulty_stats (
+            difficulty TEXT PRIMARY KEY,
+            answers INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            timeouts INTEGER NOT NULL,
+            response_histogram BLOB NOT NULL
+        )
+    """)
+    _create_search_index(cursor)
     conn.commit()
-    conn.close()
-    print("Banco de dados 'ranking.db' inicializado com sucesso.")
+
+# Índice de busca textual (FTS5) sobre enunciado e respostas, mantido por gatilhos. Se o SQLite não
+# tiver FTS5, a busca cai para LIKE, mais lenta mas com o mesmo resultado para termos simples.
+_SEARCH_COLUMNS = "question_text, correct_answer, incorrect_answer_1, incorrect_answer_2, incorrect_answer_3"
+fts_enabled = True
+
+def _create_search_index(cursor: sqlite3.Cursor):
+    global fts_enabled
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'custom_questions_fts'").fetchone()
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS custom_questions_fts USING fts5(
+                {_SEARCH_COLUMNS}, content='custom_questions', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        fts_enabled = False
+        return
+    new_values = ", ".join(f"new.{column}" for column in _SEARCH_COLUMNS.split(", "))
+    old_values = ", ".join(f"old.{column}" for column in _SEARCH_COLUMNS.split(", "))
+    delete = f"INSERT INTO custom_questions_fts (custom_questions_fts, rowid, {_SEARCH_COLUMNS}) VALUES ('delete', old.id, {old_values});"
+    insert = f"INSERT INTO custom_questions_fts (rowid, {_SEARCH_COLUMNS}) VALUES (new.id, {new_values});"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS custom_questions_fts_ai AFTER INSERT ON custom_questions BEGIN {insert} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS custom_questions_fts_ad AFTER DELETE ON custom_questions BEGIN {delete} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS custom_questions_fts_au AFTER UPDATE ON custom_questions BEGIN {delete} {insert} END")
+    # Bancos criados antes do índice: indexa as perguntas que já existem.
+    if not exists: cursor.execute("INSERT INTO custom_questions_fts (custom_questions_fts) VALUES ('rebuild')")
 
 def update_player_score(player_name: str, score_to_add: int, host_name: str):
-    conn = get_db_connection()
+    with pooled_connection() as conn:
+        _add_player_score(conn, player_name, score_to_add, host_name)
+        conn.commit()
+    print(f"Ranking de '{host_name}': Pontuação de '{player_name}' atualizada com {score_to_add} pontos.")
+
+def apply_score_deltas(deltas: List[Tuple[str, int, str]]) -> Dict[str, int]:
+    # Upsert em lote: (player_name, score_to_add, host_name), tudo numa única transação.
+    # Devolve a nova versão do ranking de cada anfitrião tocado pelo lote.
+    hosts = sorted({host_name for _, _, host_name in deltas})
+    with pooled_connection() as conn:
+        conn.executemany(
+            "INSERT INTO ranking (player_name, total_score, host_name) VALUES (?, ?, ?) "
+            "ON CONFLICT(player_name, host_name) DO UPDATE SET total_score = total_score + excluded.total_score",
+            deltas
+        )
+        conn.executemany(
+            "INSERT INTO ranking_versions (host_name, version) VALUES (?, 1) ON CONFLICT(host_name) DO UPDATE SET version = version + 1",
+            [(host_name,) for host_name in hosts]
+        )
+        versions = {}
+        for start in range(0, len(hosts), 500):
+            chunk = hosts[start:start + 500]
+            rows = conn.execute(f"SELECT host_name, version FROM ranking_versions WHERE host_name IN ({', '.join('?' for _ in chunk)})", chunk)
+            versions.update((row["host_name"], row["version"]) for row in rows)
+        conn.commit()
+    return versions
+
+def checkpoint():
+    with pooled_connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def _add_player_score(conn: sqlite3.Connection, player_name: str, score_to_add: int, host_name: str):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM ranking WHERE player_name = ? AND host_name = ?", (player_name, host_name))
     player = cursor.fetchone()
@@ -47,68 +223,221 @@ def update_player_score(player_name: str, score_to_add: int, host_name: str):
         cursor.execute("UPDATE ranking SET total_score = ? WHERE player_name = ? AND host_name = ?", (new_score, player_name, host_name))
     else:
         cursor.execute("INSERT INTO ranking (player_name, total_score, host_name) VALUES (?, ?, ?)", (player_name, score_to_add, host_name))
-    conn.commit()
-    conn.close()
-    print(f"Ranking de '{host_name}': Pontuação de '{player_name}' atualizada com {score_to_add} pontos.")
 
-def get_ranking(host_name: str, limit: int = 10):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT player_name, total_score FROM ranking WHERE host_name = ? ORDER BY total_score DESC LIMIT ?", (host_name, limit))
-    ranking_data = cursor.fetchall()
-    conn.close()
-    return [{"name": row["player_name"], "score": row["total_score"]} for row in ranking_data]
+def get_host_scores(host_name: str) -> Tuple[List[Tuple[str, int]], int]:
+    # Pontuações e versão lidas na mesma transação (o mesmo snapshot do WAL).
+    with pooled_connection() as conn:
+        conn.execute("BEGIN")
+        rows = conn.execute("SELECT player_name, total_score FROM ranking WHERE host_name = ?", (host_name,)).fetchall()
+        version = conn.execute("SELECT version FROM ranking_versions WHERE host_name = ?", (host_name,)).fetchone()
+        conn.rollback()
+    return [(row["player_name"], row["total_score"]) for row in rows], version["version"] if version else 0
 
 def add_question(question_data: Dict, player_name: str) -> int:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO custom_questions (question_text, correct_answer, incorrect_answer_1, incorrect_answer_2, incorrect_answer_3, difficulty, created_by) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (
-            question_data["question_text"], question_data["correct_answer"],
-            question_data["incorrect_answers"][0], question_data["incorrect_answers"][1],
-            question_data["incorrect_answers"][2], question_data["difficulty"],
-            player_name
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO custom_questions (question_text, correct_answer, incorrect_answer_1, incorrect_answer_2, incorrect_answer_3, difficulty, created_by) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                question_data["question_text"], question_data["correct_answer"],
+                question_data["incorrect_answers"][0], question_data["incorrect_answers"][1],
+                question_data["incorrect_answers"][2], question_data["difficulty"],
+                player_name
+            )
         )
-    )
-    new_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+        new_id = cursor.lastrowid
+        conn.commit()
     return new_id
 
+def add_questions(questions: List[Dict], player_name: str) -> int:
+    # Importação em massa: um lote inteiro numa única transação.
+    with pooled_connection() as conn:
+        conn.executemany(
+            "INSERT INTO custom_questions (question_text, correct_answer, incorrect_answer_1, incorrect_answer_2, incorrect_answer_3, difficulty, created_by) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(q["question_text"], q["correct_answer"], *q["incorrect_answers"], q["difficulty"], player_name) for q in questions]
+        )
+        conn.commit()
+    return len(questions)
+
+def get_question_history(player_names: List[str]) -> Dict[str, Tuple[bytes, bytes]]:
+    if not player_names: return {}
+    placeholders = ", ".join("?" for _ in player_names)
+    with pooled_connection() as conn:
+        rows = conn.execute(f"SELECT * FROM question_history WHERE player_name IN ({placeholders})", list(player_names)).fetchall()
+    return {row["player_name"]: (row["seen_default"], row["seen_custom_ids"]) for row in rows}
+
+def merge_question_history(rows: List[Tuple[str, bytes, bytes]]):
+    # Upsert em lote que só acrescenta: workers gravando o mesmo jogador não se sobrescrevem.
+    with pooled_connection() as conn:
+        conn.executemany(
+            "INSERT INTO question_history (player_name, seen_default, seen_custom_ids) VALUES (?, ?, ?) "
+            "ON CONFLICT(player_name) DO UPDATE SET seen_default = blob_or(seen_default, excluded.seen_default), "
+            "seen_custom_ids = ids_union(seen_custom_ids, excluded.seen_custom_ids)",
+            rows
+        )
+        conn.commit()
+
+ANSWER_BUCKET_MS, ANSWER_BUCKETS = 250, 128
+
+def _histogram(blob: Optional[bytes]) -> array:
+    return array("I", blob) if blob else array("I", bytes(4 * ANSWER_BUCKETS))
+
+def histogram_add(a: Optional[bytes], b: Optional[bytes]) -> bytes:
+    # Registrada como função SQL: soma dois histogramas de tempo de resposta, faixa a faixa.
+    return array("I", map(operator.add, _histogram(a), _histogram(b))).tobytes()
+
+def add_answer_events(events: List[Tuple[float, str, str, str, int, str, int, int, int]]):
+    # (answered_at, room_id, player_name, source, question_key, difficulty, correct, timed_out, response_ms).
+    # Eventos e agregados entram na mesma transação: os agregados nunca divergem do log.
+    by_question: Dict[Tuple[str, int], List] = {}
+    by_difficulty: Dict[str, List] = {}
+    for _, _, _, source, key, difficulty, correct, timed_out, response_ms in events:
+        question = by_question.get((source, key))
+        if question is None: question = by_question[(source, key)] = [source, key, difficulty, 0, 0, 0, _histogram(None)]
+        question[2] = difficulty
+        group = by_difficulty.get(difficulty)
+        if group is None: group = by_difficulty[difficulty] = [difficulty, 0, 0, 0, _histogram(None)]
+        bucket = min(response_ms // ANSWER_BUCKET_MS, ANSWER_BUCKETS - 1)
+        for entry in (question, group):
+            entry[-4] += 1
+            entry[-3] += correct
+            entry[-2] += timed_out
+            if not timed_out: entry[-1][bucket] += 1
+    merge = ("answers = answers + excluded.answers, correct = correct + excluded.correct, timeouts = timeouts + excluded.timeouts, "
+             "response_histogram = histogram_add(response_histogram, excluded.response_histogram)")
+    with pooled_connection() as conn:
+        conn.executemany(
+            "INSERT INTO answer_events (answered_at, room_id, player_name, source, question_key, difficulty, correct, timed_out, response_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", events
+        )
+        conn.executemany(
+            "INSERT INTO answer_stats (source, question_key, difficulty, answers, correct, timeouts, response_histogram) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(source, question_key) DO UPDATE SET difficulty = excluded.difficulty, {merge}",
+            [(*entry[:-1], entry[-1].tobytes()) for entry in by_question.values()]
+        )
+        conn.executemany(
+            "INSERT INTO answer_difficulty_stats (difficulty, answers, correct, timeouts, response_histogram) VALUES (?, ?, ?, ?, ?) "
+            f"ON CONFLICT(difficulty) DO UPDATE SET {merge}",
+            [(*entry[:-1], entry[-1].tobytes()) for entry in by_difficulty.values()]
+        )
+        conn.commit()
+
+def _median_ms(blob: bytes) -> Optional[int]:
+    # Mediana estimada pelo meio da faixa que contém a resposta do meio.
+    histogram = _histogram(blob)
+    total, seen = sum(histogram), 0
+    if not total: return None
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen * 2 >= total: return bucket * ANSWER_BUCKET_MS + ANSWER_BUCKET_MS // 2
+
+def _answer_summary(row: sqlite3.Row) -> Dict:
+    return {"answers": row["answers"], "correct": row["correct"], "timeouts": row["timeouts"],
+            "accuracy": round(row["correct"] / row["answers"], 4) if row["answers"] else None,
+            "median_response_ms": _median_ms(row["response_histogram"])}
+
+def get_answer_stats(source: Optional[str] = None, difficulty: Optional[str] = None, min_answers: int = 1, limit: int = 50) -> Dict:
+    # Lê só os agregados: o custo depende do número de perguntas pedidas, não do volume de respostas.
+    filters, params = ["answers >= ?"], [min_answers]
+    if source: filters.append("source = ?"); params.append(source)
+    if difficulty: filters.append("s.difficulty = ?"); params.append(difficulty)
+    with pooled_connection() as conn:
+        totals = conn.execute("SELECT * FROM answer_difficulty_stats ORDER BY difficulty").fetchall()
+        rows = conn.execute(
+            "SELECT s.*, c.question_text FROM answer_stats s "
+            "LEFT JOIN custom_questions c ON s.source = 'custom' AND c.id = s.question_key "
+            f"WHERE {' AND '.join(filters)} ORDER BY answers DESC, source, question_key LIMIT ?", params + [limit]
+        ).fetchall()
+    return {
+        "by_difficulty": [{"difficulty": row["difficulty"], **_answer_summary(row)} for row in totals],
+        "questions": [{"source": row["source"], "id": row["question_key"], "difficulty": row["difficulty"], "question": row["question_text"],
+                       **_answer_summary(row)} for row in rows],
+    }
+
 def get_questions_by_player(player_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM custom_questions WHERE created_by = ?", (player_name,))
-    questions_data = cursor.fetchall()
-    conn.close()
-    formatted_questions = []
+    return get_questions_by_players([player_name]).get(player_name, [])
+
+def get_questions_by_players(player_names: List[str]) -> Dict[str, List[Dict]]:
+    # Uma única consulta para todos os jogadores da sala, agrupada por autor.
+    if not player_names: return {}
+    placeholders = ", ".join("?" for _ in player_names)
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM custom_questions WHERE created_by IN ({placeholders})", list(player_names))
+        questions_data = cursor.fetchall()
+    formatted_questions: Dict[str, List[Dict]] = {}
     for row in questions_data:
-        formatted_questions.append({
-            "id": row["id"], "question": row["question_text"],
-            "options": [row["correct_answer"], row["incorrect_answer_1"], row["incorrect_answer_2"], row["incorrect_answer_3"]],
-            "correctAnswer": row["correct_answer"], "difficulty": row["difficulty"]
-        })
+        formatted_questions.setdefault(row["created_by"], []).append(_format_question(row))
     return formatted_questions
 
+def _options(row: sqlite3.Row) -> List[str]:
+    # Na tabela a resposta correta vem primeiro; fora dela as opções saem na ordem canônica do banco compartilhado.
+    return list(shuffled_options(row["question_text"], (row["correct_answer"], row["incorrect_answer_1"],
+                                                        row["incorrect_answer_2"], row["incorrect_answer_3"])))
+
+def _format_question(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"], "question": row["question_text"],
+        "options": _options(row),
+        "correctAnswer": row["correct_answer"], "difficulty": row["difficulty"]
+    }
+
+def get_questions_page(player_name: str, after_id: int = 0, limit: int = 50) -> List[Dict]:
+    # Paginação por chave (id > after_id) sobre o prefixo created_by do índice (created_by, difficulty); a ordem
+    # por id pede uma ordenação das perguntas do autor, que são poucas.
+    with pooled_connection() as conn:
+        rows = conn.execute(
+            "SELECT * FROM custom_questions WHERE created_by = ? AND id > ? ORDER BY id LIMIT ?", (player_name, after_id, limit)
+        ).fetchall()
+    return [_format_question(row) for row in rows]
+
+def search_terms(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+def search_questions(text: str = "", author: Optional[str] = None, difficulty: Optional[str] = None,
+                     after_id: int = 0, limit: int = 20) -> List[Dict]:
+    # Perguntas personalizadas em ordem de id, a partir de after_id; cada termo casa como prefixo.
+    terms = search_terms(text)
+    if terms and fts_enabled:
+        # O índice FTS conduz a consulta em ordem de rowid, parando assim que a página enche.
+        source = "custom_questions_fts f JOIN custom_questions c ON c.id = f.rowid"
+        conditions, params = ["custom_questions_fts MATCH ?", "f.rowid > ?"], [" ".join(f'"{term}"*' for term in terms), after_id]
+        order = "f.rowid"
+    else:
+        source, conditions, params, order = "custom_questions c", ["c.id > ?"], [after_id], "c.id"
+    for term in terms if not fts_enabled else ():
+        conditions.append(f"({' OR '.join(f'c.{column} LIKE ?' for column in _SEARCH_COLUMNS.split(', '))})")
+        params.extend([f"%{term}%"] * 5)
+    if author is not None:
+        conditions.append("c.created_by = ?")
+        params.append(author)
+    if difficulty is not None:
+        conditions.append("c.difficulty = ?")
+        params.append(difficulty)
+    params.append(limit)
+    with pooled_connection() as conn:
+        rows = conn.execute(f"SELECT c.* FROM {source} WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?", params).fetchall()
+    # Resultado público: sem a resposta correta, como a exportação do banco padrão.
+    return [{"id": row["id"], "question": row["question_text"],
+             "options": _options(row),
+             "difficulty": row["difficulty"], "author": row["created_by"]} for row in rows]
+
 def update_question(question_id: int, question_data: Dict, player_name: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE custom_questions SET question_text = ?, correct_answer = ?, incorrect_answer_1 = ?, incorrect_answer_2 = ?, incorrect_answer_3 = ?, difficulty = ? WHERE id = ? AND created_by = ?",
-        (
-            question_data["question_text"], question_data["correct_answer"],
-            question_data["incorrect_answers"][0], question_data["incorrect_answers"][1],
-            question_data["incorrect_answers"][2], question_data["difficulty"],
-            question_id, player_name
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE custom_questions SET question_text = ?, correct_answer = ?, incorrect_answer_1 = ?, incorrect_answer_2 = ?, incorrect_answer_3 = ?, difficulty = ? WHERE id = ? AND created_by = ?",
+            (
+                question_data["question_text"], question_data["correct_answer"],
+                question_data["incorrect_answers"][0], question_data["incorrect_answers"][1],
+                question_data["incorrect_answers"][2], question_data["difficulty"],
+                question_id, player_name
+            )
         )
-    )
-    conn.commit()
-    conn.close()
+        conn.commit()
 
 def delete_question(question_id: int, player_name: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM custom_questions WHERE id = ? AND created_by = ?", (question_id, player_name))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM custom_questions WHERE id = ? AND created_by = ?", (question_id, player_name))
+        conn.commit()
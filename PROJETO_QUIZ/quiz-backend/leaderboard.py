@@ -0,0 +1,92 @@
+# leaderboard.py
+# Ranking por anfitrião mantido em memória e atualizado a cada gravação do ScoreSink.
+# Cada anfitrião carregado guarda uma lista ordenada por (-pontuação, nome): página e posição
+# de um jogador saem por fatiamento/bisect, sem ORDER BY no SQLite.
+# Cada lote gravado avança a versão do ranking do anfitrião (tabela ranking_versions) e o evento "scores"
+# leva essa versão. Uma cópia carregada do banco sabe em que versão foi lida: deltas que ela já inclui
+# (gravados por outro worker antes da leitura) são ignorados, e um salto de versão descarta a cópia.
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import database
+
+class HostLeaderboard:
+    __slots__ = ("scores", "order", "version")
+    def __init__(self, rows: Iterable[Tuple[str, int]], version: int = 0):
+        self.scores: Dict[str, int] = dict(rows)
+        self.order: List[Tuple[int, str]] = sorted((-score, name) for name, score in self.scores.items())
+        self.version = version
+
+    def advance(self, version: int, deltas: Iterable[Tuple[str, int]]) -> bool:
+        # Aplica o lote da versão seguinte; False se faltou algum lote (a cópia deve ser relida).
+        if version <= self.version: return True
+        if version != self.version + 1: return False
+        for player_name, score_to_add in deltas: self.add(player_name, score_to_add)
+        self.version = version
+        return True
+
+    def add(self, player_name: str, score_to_add: int):
+        old = self.scores.get(player_name)
+        if old is not None: del self.order[bisect_left(self.order, (-old, player_name))]
+        new = (old or 0) + score_to_add
+        self.scores[player_name] = new
+        insort(self.order, (-new, player_name))
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        return [{"rank": offset + i + 1, "name": name, "score": -score}
+                for i, (score, name) in enumerate(self.order[offset:offset + limit])]
+
+    def rank_of(self, player_name: str) -> Optional[Dict]:
+        score = self.scores.get(player_name)
+        if score is None: return None
+        return {"rank": bisect_left(self.order, (-score, player_name)) + 1, "name": player_name, "score": score}
+
+class Leaderboards:
+    def __init__(self, max_hosts: int = 512):
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, HostLeaderboard]" = OrderedDict()
+        # Lotes que chegam enquanto um anfitrião está sendo lido do banco: aplicados à cópia recém-lida
+        # (os que ela já inclui são ignorados pela versão).
+        self._loading: Dict[str, List[Tuple[int, List[Tuple[str, int]]]]] = {}
+        self.reloads = 0
+
+    async def get(self, host_name: str) -> HostLeaderboard:
+        board = self._hosts.get(host_name)
+        if board is None:
+            buffered = self._loading.setdefault(host_name, [])
+            try:
+                rows, version = await database.run_read(database.get_host_scores, host_name)
+            finally:
+                if self._loading.get(host_name) is buffered: del self._loading[host_name]
+            board = self._hosts.get(host_name)
+            if board is None:
+                board = HostLeaderboard(rows, version)
+                if all(board.advance(version, deltas) for version, deltas in sorted(buffered, key=lambda item: item[0])):
+                    self._hosts[host_name] = board
+                    while len(self._hosts) > self.max_hosts: self._hosts.popitem(last=False)
+                else:
+                    # Lotes fora de ordem durante a leitura: esta resposta usa a cópia lida, a próxima relê.
+                    return HostLeaderboard(rows, version)
+        self._hosts.move_to_end(host_name)
+        return board
+
+    def apply(self, event: Dict):
+        # Evento "scores" (deste ou de outro worker): {"deltas": [(jogador, pontos, anfitrião)], "versions": {anfitrião: versão}}.
+        # Anfitriões não carregados serão lidos do banco quando alguém pedir o ranking.
+        by_host: Dict[str, List[Tuple[str, int]]] = {}
+        for player_name, score_to_add, host_name in event["deltas"]:
+            by_host.setdefault(host_name, []).append((player_name, score_to_add))
+        for host_name, version in event["versions"].items():
+            deltas = by_host.get(host_name, [])
+            buffered = self._loading.get(host_name)
+            if buffered is not None: buffered.append((version, deltas))
+            board = self._hosts.get(host_name)
+            if board is not None and not board.advance(version, deltas):
+                # Um lote se perdeu (datagrama descartado ou fora de ordem): a cópia será relida do banco.
+                del self._hosts[host_name]
+                self.reloads += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"hosts": len(self._hosts), "reloads": self.reloads}
+
+leaderboards = Leaderboards()
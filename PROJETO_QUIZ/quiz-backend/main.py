@@ -1,12 +1,36 @@
 # main.py (Versão com correção do erro 404)
 import asyncio
+import base64
 import json
+import os
+import time
 import random
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+from fastapi import FastAPI, WebSocket, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Any
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Tuple
 import database
+import metrics
+import wire
+import question_io
+import state_delta
+from score_sink import score_sink
+from question_history import question_history
+from answer_log import answer_log
+from question_bank import bank
+from question_cache import question_cache
+from leaderboard import leaderboards
+from timer_wheel import wheel
+from room_backend import backend
+from room_actor import actors
+from room_reaper import reaper
+from admission import admission, TokenBucket, CLOSE_CODES, WS_MAX_SIZE
+from room import Room
+from versions import versions
+from static_assets import assets, accepted_encodings, IMMUTABLE
 
 app = FastAPI()
 
@@ -24,8 +48,142 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     database.init_db()
+    question_cache.on_evict = bank.release
+    # Variantes do frontend geradas (ou reaproveitadas do cache em disco) fora do loop de eventos.
+    if assets.enabled: await asyncio.get_running_loop().run_in_executor(None, assets.build)
+    # Eventos que precisam chegar a todos os workers passam pelo backend de salas.
+    backend.subscribe("scores", leaderboards.apply)
+    backend.subscribe("questions", question_cache.invalidate)
+    backend.subscribe("scores", lambda event: versions.bump("ranking", event["versions"]))
+    backend.subscribe("questions", lambda player_name: versions.bump("questions", (player_name,)))
+    backend.on_remote_connection = websocket_endpoint
+    actors.handler = handle_command
+    actors.is_active = lambda room_id: room_id in game_states or room_id in manager.rooms
+    reaper.rooms, reaper.submit = game_states, actors.submit
+    reaper.is_connected = lambda room_id: room_id in manager.rooms
+    score_sink.on_flush = lambda deltas, versions: backend.publish("scores", {"deltas": deltas, "versions": versions})
+    await backend.start()
+    score_sink.start()
+    question_history.start()
+    answer_log.start()
+    wheel.start()
+    bank.start()
+    reaper.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await reaper.stop()
+    await wheel.stop()
+    await bank.stop()
+    await actors.close()
+    await question_history.close()
+    await answer_log.close()
+    await score_sink.close()
+    await backend.stop()
+    database.close_pool()
+
+def process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "worker": backend.worker_id, "rooms": len(game_states),
+        "players": sum(len(room) for room in game_states.values()),
+        "sockets": sum(len(connections) for connections in manager.rooms.values()),
+        "rss_bytes": process_rss_bytes(), "db_writes": database.write_stats,
+        "score_sink": score_sink.stats(), "question_cache": question_cache.stats(), "timers": wheel.stats(), "question_bank": bank.stats(),
+        "question_history": question_history.stats(), "answer_log": answer_log.stats(),
+        "actors": actors.stats(), "sessions": {"away": sum(len(room.away) for room in game_states.values()), **resumes},
+        "room_lifecycle": reaper.stats(), "admission": admission.stats(), "versions": versions.stats(), "leaderboards": leaderboards.stats(), "assets": assets.stats(), "room_bytes": sum(room.approx_bytes() for room in game_states.values()),
+    }
+
+@app.get("/stats/answers")
+async def get_answer_stats(source: str = Query(None, pattern="^(default|custom)$"), difficulty: str = None,
+                           min_answers: int = Query(1, ge=1), limit: int = Query(50, ge=1, le=500)):
+    # Acerto e mediana do tempo de resposta por dificuldade e por pergunta (ids de questions.json ou do banco).
+    stats = await database.run_read(database.get_answer_stats, source, difficulty, min_answers, limit)
+    by_key = bank.defaults.by_key
+    for question in stats["questions"]:
+        if question["source"] == "default" and question["id"] in by_key: question["question"] = bank.get(by_key[question["id"]]).question
+    return stats
+
+@app.get("/rooms")
+async def list_rooms(limit: int = Query(50, ge=1, le=1000)):
+    # Salas deste worker, das que mais ocupam memória para as menores.
+    now = time.monotonic()
+    rooms = sorted(((room.approx_bytes(), room) for room in game_states.values()), key=lambda item: item[0], reverse=True)
+    return [{"room_id": room.room_id, "host": room.host, "players": len(room), "away": len(room.away),
+             "sockets": len(manager.rooms.get(room.room_id, ())), "started": room.game_started,
+             "questions_left": len(room.questions), "idle_seconds": round(now - room.last_activity, 1), "approx_bytes": size}
+            for size, room in rooms[:limit]]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header: return False
+    return any(tag.strip().removeprefix("W/") in (f'"{etag}"', "*") for tag in header.split(","))
+
+def cached_json(request: Request, etag: str, body: bytes, cache_control: str = "no-cache") -> Response:
+    headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control}
+    if etag_matches(request, etag): return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def check_version(request: Request, kind: str, key: str) -> Tuple[Dict[str, str], bool]:
+    # Cabeçalhos de validação do recurso e se o cliente já tem esta versão. If-None-Match tem precedência;
+    # If-Modified-Since só é considerado sem ele.
+    stamp = versions.get(kind, key)
+    headers = versions.headers(stamp)
+    if request.headers.get("if-none-match") is not None: return headers, etag_matches(request, headers["ETag"][1:-1])
+    since = request.headers.get("if-modified-since")
+    try: return headers, since is not None and parsedate_to_datetime(since).timestamp() >= stamp
+    except (TypeError, ValueError): return headers, False
+
+@app.get("/bank")
+async def get_default_bank(request: Request, difficulty: str = None):
+    # Os clientes baixam o banco uma vez e revalidam pelo ETag; os turnos passam a levar só o id da pergunta.
+    defaults = bank.defaults
+    if difficulty: return cached_json(request, *defaults.export_difficulty(bank.records, difficulty))
+    return cached_json(request, defaults.version, defaults.payload)
+
+@app.get("/rooms/{room_id}/bank")
+async def get_room_bank(room_id: str, request: Request):
+    # Banco padrão + perguntas personalizadas da sala. Os ids do banco são locais ao worker dono da sala e só o
+    # WebSocket é repassado a ele; com QUIZ_WORKERS > 1 a rota fica desligada em vez de responder conforme o worker.
+    if backend.workers > 1: raise HTTPException(status_code=501, detail="Indisponível com QUIZ_WORKERS > 1.")
+    room = game_states.get(room_id)
+    if not room: raise HTTPException(status_code=404, detail="Sala não encontrada.")
+    defaults = bank.defaults
+    if room.bank_export is None or room.bank_export[0] != defaults.version:
+        room.bank_export = (defaults.version, bank.export(defaults.ids + room.custom_ids))
+    version, payload = room.bank_export[1]
+    return cached_json(request, version, payload)
+
+@app.get("/app", include_in_schema=False)
+async def frontend_root():
+    return RedirectResponse("/app/")
+
+@app.api_route("/app/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_frontend_asset(path: str, request: Request, w: int = Query(None, ge=1, le=4096)):
+    # Frontend opcional (QUIZ_FRONTEND_DIR). Nomes com hash são imutáveis; o index.html e os nomes originais
+    # revalidam pelo ETag. Range/If-Range e o envio em blocos ficam com o FileResponse.
+    asset = assets.get(path)
+    if asset is None: raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
+    variant = asset.select(accepted_encodings(request.headers.get("accept-encoding", "")), request.headers.get("accept", ""),
+                           w, "range" in request.headers)
+    headers = {"ETag": f'"{variant.etag}"', "Cache-Control": IMMUTABLE if path == asset.hashed_name else "no-cache"}
+    if asset.vary: headers["Vary"] = asset.vary
+    if variant.encoding: headers["Content-Encoding"] = variant.encoding
+    if etag_matches(request, variant.etag): return Response(status_code=304, headers=headers)
+    return FileResponse(variant.path, headers=headers, media_type=variant.media_type, stat_result=variant.stat)
 
 class Question(BaseModel):
     question_text: str
@@ -33,746 +191,586 @@ class Question(BaseModel):
     incorrect_answers: List[str]
     difficulty: str
 
+@app.get("/search/questions")
+async def search_questions(q: str = "", difficulty: str = None, author: str = None,
+                           source: str = Query("all", pattern="^(all|default|custom)$"),
+                           after: str = Query(None, pattern=r"^[dc]\d+$"), limit: int = Query(20, ge=1, le=100)):
+    # Perguntas padrão primeiro (por posição), depois as personalizadas (por id). O cursor `next`
+    # ("d<posição>" ou "c<id>") marca onde a página parou: paginação por chave, sem OFFSET.
+    after_source, after_key = (after[0], int(after[1:])) if after else ("d", -1)
+    items = []
+    if source != "custom" and author is None and after_source == "d":
+        items = [{**item, "source": "default"} for item in bank.defaults.search(bank.records, database.search_terms(q), difficulty, after_key, limit + 1)]
+    if len(items) <= limit and source != "default":
+        rows = await database.run_read(database.search_questions, q, author, difficulty, after_key if after_source == "c" else 0, limit + 1 - len(items))
+        items += [{**row, "source": "custom"} for row in rows]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = f"{items[-1]['source'][0]}{items[-1]['id']}"
+    return {"items": items, "next": next_cursor}
+
 @app.get("/questions/{player_name}", response_model=List[Dict])
-def get_player_questions(player_name: str):
-    return database.get_questions_by_player(player_name)
+async def get_player_questions(player_name: str, request: Request, after: int = Query(None, ge=0), limit: int = Query(None, ge=1, le=500)):
+    # Sem parâmetros, devolve todas (como o editor espera); com limit/after, pagina por id.
+    # A versão é lida antes dos dados: uma gravação no meio do caminho só invalida o ETag, nunca o contrário.
+    headers, fresh = check_version(request, "questions", player_name)
+    if fresh: return Response(status_code=304, headers=headers)
+    if limit is None and after is None:
+        questions = await database.run_read(database.get_questions_by_player, player_name)
+    else:
+        questions = await database.run_read(database.get_questions_page, player_name, after or 0, limit or 50)
+    return JSONResponse(questions, headers=headers)
 @app.post("/questions/{player_name}", status_code=201)
-def create_question_for_player(player_name: str, question: Question):
+async def create_question_for_player(player_name: str, question: Question):
     if len(question.incorrect_answers) != 3: raise HTTPException(status_code=400, detail="É necessário fornecer 3 respostas incorretas.")
-    new_id = database.add_question(question.dict(), player_name)
+    new_id = await database.run_write(database.add_question, question.dict(), player_name)
+    backend.publish("questions", player_name)
     return {"message": "Pergunta criada com sucesso", "id": new_id}
+IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS = 500, 100
+
+@app.post("/questions/{player_name}/import")
+async def import_questions(player_name: str, request: Request, format: str = None):
+    # Corpo em NDJSON (um objeto Question por linha) ou CSV (cabeçalho com question_text, correct_answer,
+    # incorrect_answer_1..3, difficulty). Linhas válidas entram em lotes; as inválidas são relatadas.
+    fmt = question_io.detect_format(request.headers.get("content-type", ""), format)
+    if fmt is None: raise HTTPException(status_code=415, detail="Use NDJSON ou CSV (Content-Type ou ?format=ndjson|csv).")
+    inserted, error_count, errors, batch = 0, 0, [], []
+    try:
+        async for line, record, error in question_io.records(request.stream(), fmt):
+            if error is None:
+                try:
+                    question = Question(**record)
+                    if len(question.incorrect_answers) != 3: error = "É necessário fornecer 3 respostas incorretas."
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                except TypeError:
+                    error = "O registro deve ser um objeto."
+            if error is not None:
+                error_count += 1
+                if len(errors) < IMPORT_MAX_ERRORS: errors.append({"line": line, "error": error})
+                continue
+            batch.append(question.dict())
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                inserted += await database.run_write(database.add_questions, batch, player_name)
+                batch = []
+        if batch: inserted += await database.run_write(database.add_questions, batch, player_name)
+    finally:
+        # Lotes já gravados valem mesmo se o corpo falhar no meio: invalida o cache dos outros workers também.
+        if inserted: backend.publish("questions", player_name)
+    return {"inserted": inserted, "error_count": error_count, "errors": errors}
+
+@app.get("/questions/{player_name}/export")
+async def export_questions(player_name: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    # Lê e envia página a página (paginação por id), sem montar a lista inteira em memória.
+    async def stream():
+        after, first = 0, True
+        while True:
+            page = await database.run_read(database.get_questions_page, player_name, after, IMPORT_BATCH_SIZE)
+            if page or first: yield question_io.encode(page, format, header=first)
+            if len(page) < IMPORT_BATCH_SIZE: return
+            after, first = page[-1]["id"], False
+    return StreamingResponse(stream(), media_type=question_io.MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(f'perguntas-{player_name}.{format}')}"})
+
 @app.put("/questions/{question_id}/{player_name}")
-def update_player_question(question_id: int, player_name: str, question: Question):
+async def update_player_question(question_id: int, player_name: str, question: Question):
     if len(question.incorrect_answers) != 3: raise HTTPException(status_code=400, detail="É necessário fornecer 3 respostas incorretas.")
-    database.update_question(question_id, question.dict(), player_name)
+    await database.run_write(database.update_question, question_id, question.dict(), player_name)
+    backend.publish("questions", player_name)
     return {"message": f"Pergunta {question_id} atualizada com sucesso"}
 @app.delete("/questions/{question_id}/{player_name}")
-def delete_player_question(question_id: int, player_name: str):
-    database.delete_question(question_id, player_name)
+async def delete_player_question(question_id: int, player_name: str):
+    await database.run_write(database.delete_question, question_id, player_name)
+    backend.publish("questions", player_name)
     return {"message": f"Pergunta {question_id} deletada com sucesso"}
 
 @app.get("/ranking/{host_name}")
-def get_ranking_data(host_name: str):
-    return database.get_ranking(host_name)
+async def get_ranking_data(host_name: str, request: Request):
+    headers, fresh = check_version(request, "ranking", host_name)
+    if fresh: return Response(status_code=304, headers=headers)
+    board = await leaderboards.get(host_name)
+    return JSONResponse([{"name": entry["name"], "score": entry["score"]} for entry in board.page(0, 10)], headers=headers)
+@app.get("/ranking/{host_name}/page")
+async def get_ranking_page(host_name: str, request: Request, offset: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+    headers, fresh = check_version(request, "ranking", host_name)
+    if fresh: return Response(status_code=304, headers=headers)
+    board = await leaderboards.get(host_name)
+    return JSONResponse({"host": host_name, "total": len(board.order), "offset": offset, "limit": limit, "items": board.page(offset, limit)}, headers=headers)
+@app.get("/ranking/{host_name}/player/{player_name}")
+async def get_player_rank(host_name: str, player_name: str, request: Request):
+    headers, fresh = check_version(request, "ranking", host_name)
+    if fresh: return Response(status_code=304, headers=headers)
+    board = await leaderboards.get(host_name)
+    entry = board.rank_of(player_name)
+    if entry is None: raise HTTPException(status_code=404, detail="Jogador não encontrado no ranking.")
+    return JSONResponse({**entry, "total": len(board.order)}, headers=headers)
+
+SEND_QUEUE_SIZE = 64
+# Código de fechamento do socket antigo de um jogador que conectou de novo com o mesmo id.
+SUPERSEDED_CLOSE_CODE = 4000
+
+# Socket de um jogador com fila de saída própria (limitada), drenada por uma task dedicada.
+class Connection:
+    __slots__ = ("websocket", "queue", "writer", "delta", "needs_snapshot", "codec", "bank_version", "view")
+    def __init__(self, websocket: WebSocket, delta: bool = False, codec: wire.Codec = wire.JSON, bank_version: str = None):
+        self.websocket, self.codec = websocket, codec
+        # Versão do banco padrão que o cliente já tem (?qref=); a visão enviada por último fica em `view`.
+        self.bank_version, self.view = bank_version, None
+        # Clientes com delta=True recebem gameStatePatch; o primeiro envio é sempre um snapshot completo.
+        self.delta, self.needs_snapshot = delta, True
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.writer = asyncio.create_task(self._drain())
+    def current_view(self) -> str:
+        # Referências só para quem tem o banco padrão na versão atual; os demais recebem a pergunta completa.
+        # Se a visão mudar (o banco foi recarregado), o próximo envio é um snapshot.
+        view = "ref" if self.bank_version is not None and self.bank_version == bank.defaults.version else "full"
+        if view != self.view: self.view, self.needs_snapshot = view, True
+        return view
+    def send(self, frame: wire.Frame) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # Cliente lento demais: fecha o socket em vez de atrasar a sala inteira.
+            metrics.slow_client_drops.inc()
+            self.drop(1013)
+            return False
+    async def _drain(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                if isinstance(frame, int):
+                    # Código de fechamento enfileirado por finish(): tudo antes dele já foi enviado.
+                    await self._close_socket(frame)
+                    return
+                if isinstance(frame, bytes): await self.websocket.send_bytes(frame)
+                else: await self.websocket.send_text(frame)
+        except asyncio.CancelledError: pass
+        except Exception: pass
+    async def _close_socket(self, code: int):
+        try: await self.websocket.close(code=code)
+        except Exception: pass
+    def close(self): self.writer.cancel()
+    def drop(self, code: int = 1000):
+        self.close()
+        asyncio.create_task(self._close_socket(code))
+    def finish(self, code: int = 1000):
+        # Fecha o socket depois de enviar o que já está na fila.
+        try: self.queue.put_nowait(code)
+        except asyncio.QueueFull: self.drop(code)
 
 class ConnectionManager:
-    def __init__(self): self.rooms: Dict[str, Dict[str, WebSocket]] = {}
-    async def connect(self, websocket: WebSocket, room_id: str, client_id: str):
-        await websocket.accept()
+    def __init__(self): self.rooms: Dict[str, Dict[str, Connection]] = {}
+    async def connect(self, websocket: WebSocket, room_id: str, client_id: str, delta: bool = False, bank_version: str = None):
+        codec, subprotocol = wire.negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
         if room_id not in self.rooms: self.rooms[room_id] = {}
-        self.rooms[room_id][client_id] = websocket
-    def disconnect(self, room_id: str, client_id: str):
+        old = self.rooms[room_id].get(client_id)
+        # O socket substituído é fechado de fato (fechamento limpo: o cliente antigo não tenta reconectar).
+        if old: old.drop(SUPERSEDED_CLOSE_CODE)
+        self.rooms[room_id][client_id] = Connection(websocket, delta, codec, bank_version)
+    def disconnect(self, room_id: str, client_id: str, websocket: WebSocket = None) -> bool:
         if room_id in self.rooms and client_id in self.rooms[room_id]:
-            del self.rooms[room_id][client_id]
+            # Ignora o socket antigo de um cliente que já reconectou com o mesmo id.
+            if websocket is not None and self.rooms[room_id][client_id].websocket is not websocket: return False
+            self.rooms[room_id].pop(client_id).close()
             if not self.rooms[room_id]: del self.rooms[room_id]
+            return True
+        return False
     async def broadcast(self, room_id: str, message: dict):
-        state = game_states.get(room_id)
-        if state and room_id in self.rooms:
-            connections = list(self.rooms[room_id].values())
-            for connection in connections: await connection.send_text(json.dumps(message))
+        # Serializa uma única vez e apenas enfileira: cada conexão envia no seu próprio ritmo.
+        if room_id in game_states and room_id in self.rooms:
+            started = time.perf_counter()
+            frames: Dict[str, wire.Frame] = {}
+            for connection in list(self.rooms[room_id].values()):
+                codec = connection.codec
+                frame = frames.get(codec.name)
+                if frame is None: frame = frames[codec.name] = codec.encode(message)
+                connection.send(frame)
+            metrics.broadcast_seconds.observe(time.perf_counter() - started)
+    async def broadcast_state(self, room_id: str, seq: int, public_states: Dict[str, dict], ops: Dict[str, list] = None, trace_ts: float = None):
+        # Um frame por formato (snapshot ou patch), por visão (pergunta completa ou referência) e por codec,
+        # serializado no máximo uma vez cada.
+        if room_id not in self.rooms: return
+        started = time.perf_counter()
+        trace = {"ts": trace_ts} if trace_ts is not None else {}
+        frames: Dict[tuple, wire.Frame] = {}
+        for connection in list(self.rooms[room_id].values()):
+            view = connection.current_view()
+            kind = "patch" if connection.delta and not connection.needs_snapshot and ops is not None else "full"
+            connection.needs_snapshot = False
+            key = (kind, view, connection.codec.name)
+            frame = frames.get(key)
+            if frame is None:
+                if kind == "patch": message = {"type": "gameStatePatch", "seq": seq, "baseSeq": seq - 1, "ops": ops[view], **trace}
+                else: message = {"type": "gameStateUpdate", "seq": seq, "state": public_states[view], **trace}
+                frame = frames[key] = connection.codec.encode(message)
+            connection.send(frame)
+        metrics.broadcast_seconds.observe(time.perf_counter() - started)
+    def resume(self, room_id: str, client_id: str, events: List[tuple]) -> bool:
+        # Reenvia só os patches perdidos a um cliente que reconectou. Se a conexão já recebeu um snapshot
+        # (houve difusão antes de o ator processar a entrada), não há nada a completar.
+        connection = self.rooms.get(room_id, {}).get(client_id)
+        if not connection or not connection.delta: return False
+        view = connection.current_view()
+        if connection.needs_snapshot:
+            connection.needs_snapshot = False
+            for seq, ops in events:
+                connection.send(connection.codec.encode({"type": "gameStatePatch", "seq": seq, "baseSeq": seq - 1, "ops": ops[view]}))
+        return True
+    def send_snapshot(self, room_id: str, client_id: str, seq: int, public_states: Dict[str, dict], time_remaining: int = None):
+        # time_remaining: o tempo restante de agora, se difere do difundido no início do turno. A base desse
+        # cliente passa a diferir do snapshot da sala, então a próxima difusão lhe envia um snapshot, não um patch.
+        connection = self.rooms.get(room_id, {}).get(client_id)
+        if connection:
+            view = connection.current_view()
+            state = public_states[view]
+            adjusted = time_remaining is not None and time_remaining != state["timeRemaining"]
+            if adjusted: state = {**state, "timeRemaining": time_remaining}
+            connection.needs_snapshot = adjusted
+            connection.send(connection.codec.encode({"type": "gameStateUpdate", "seq": seq, "state": state}))
 
 manager = ConnectionManager()
-game_states: Dict[str, Dict[str, Any]] = {}
-# Em main.py, substitua a sua lista 'default_questions' por esta:
-default_questions = [
-    # =================================================================
-    # == NÍVEL FÁCIL (30 PERGUNTAS) ==
-    # =================================================================
-    {
-        "question": "Qual é o nome da classe que representa o modelo de um aluno?",
-        "options": ["Aluno.java", "AlunoService.java", "AlunoView.java", "AlunoModel.java"],
-        "correctAnswer": "Aluno.java",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Para que serve a anotação @Override?",
-        "options": ["Indica que um método está sendo sobrescrito da superclasse", "Sinaliza que um método será removido em versões futuras", "Define um novo método que não pode ser modificado", "Inicia a execução principal de uma classe específica"],
-        "correctAnswer": "Indica que um método está sendo sobrescrito da superclasse",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual classe é responsável pela interface e interação com o usuário no console?",
-        "options": ["AlunoView", "AlunoService", "Main", "AlunoRepository"],
-        "correctAnswer": "AlunoView",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "No menu principal em AlunoView, qual número o usuário deve digitar para sair do sistema?",
-        "options": ["0", "1", "9", "-1"],
-        "correctAnswer": "0",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual classe Java é importada em AlunoView para ler a entrada do usuário?",
-        "options": ["java.util.Scanner", "java.io.Reader", "java.util.Input", "java.console.Reader"],
-        "correctAnswer": "java.util.Scanner",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que faz um método 'getter'?",
-        "options": ["Permite o acesso seguro aos valores de atributos privados", "Modifica diretamente os valores de atributos públicos", "Exclui permanentemente um objeto da memória RAM", "Constrói uma nova instância de um objeto da classe"],
-        "correctAnswer": "Permite o acesso seguro aos valores de atributos privados",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que faz um método 'setter'?",
-        "options": ["Permite a modificação segura dos valores de atributos privados", "Acessa os valores de atributos sem permitir alterá-los", "Retorna o nome da classe em formato de texto (String)", "Verifica se um determinado objeto possui valor nulo"],
-        "correctAnswer": "Permite a modificação segura dos valores de atributos privados",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual o nome da interface que define o contrato para as operações de persistência de dados do aluno?",
-        "options": ["AlunoRepository", "AlunoPersistence", "AlunoContract", "AlunoData"],
-        "correctAnswer": "AlunoRepository",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Na classe Aluno, por que os atributos são declarados como 'private'?",
-        "options": ["Para proteger os dados e controlar o acesso através de getters e setters", "Para otimizar o consumo de memória RAM da aplicação", "Para tornar o acesso aos atributos consideravelmente mais rápido", "Para que possam ser acessados por qualquer classe em qualquer pacote"],
-        "correctAnswer": "Para proteger os dados e controlar o acesso através de getters e setters",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual o nome da classe que contém o ponto de entrada da aplicação (método main)?",
-        "options": ["Main", "App", "Start", "Program"],
-        "correctAnswer": "Main",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual o nome da classe utilitária que contém métodos de validação?",
-        "options": ["Validador", "Validator", "Utils", "Helper"],
-        "correctAnswer": "Validador",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual classe implementa AlunoRepository usando um ArrayList?",
-        "options": ["AlunoRepositoryLista", "AlunoRepositoryArray", "AlunoRepositoryList", "AlunoRepositoryVector"],
-        "correctAnswer": "AlunoRepositoryLista",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual classe implementa AlunoRepository usando um vetor (array)?",
-        "options": ["AlunoRepositoryVetor", "AlunoRepositoryArray", "AlunoRepositoryVector", "AlunoRepositoryLinked"],
-        "correctAnswer": "AlunoRepositoryVetor",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual é o tamanho máximo de alunos que AlunoRepositoryVetor pode armazenar?",
-        "options": ["100", "50", "1000", "Ilimitado"],
-        "correctAnswer": "100",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "No Validador, qual método verifica se uma string é nula ou vazia?",
-        "options": ["isNullOrEmpty", "checkIfBlank", "validateString", "isEmptyOrNull"],
-        "correctAnswer": "isNullOrEmpty",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que o método toString() na classe Aluno retorna?",
-        "options": ["Uma representação em texto com todos os dados do aluno", "Apenas o número de identificação (ID) do aluno", "O endereço de memória onde o objeto está alocado", "Um valor booleano indicando se o aluno está ativo"],
-        "correctAnswer": "Uma representação em texto com todos os dados do aluno",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual método da AlunoView é responsável por exibir o menu de opções?",
-        "options": ["mostrarMenu()", "displayOptions()", "printChoices()", "viewSelector()"],
-        "correctAnswer": "mostrarMenu()",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual classe contém a lógica de negócios e as validações para as operações de alunos?",
-        "options": ["AlunoService", "AlunoController", "AlunoBusiness", "AlunoLogic"],
-        "correctAnswer": "AlunoService",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "No menu principal, qual opção permite ao usuário cadastrar um novo aluno?",
-        "options": ["1", "2", "C", "A"],
-        "correctAnswer": "1",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Para que serve a variável 'proximoId' na classe AlunoRepositoryLista?",
-        "options": ["Para gerar um ID único para cada novo aluno cadastrado", "Para armazenar a quantidade total de alunos na lista", "Para definir o limite máximo de alunos que podem ser criados", "Para guardar o último ID de aluno que foi removido"],
-        "correctAnswer": "Para gerar um ID único para cada novo aluno cadastrado",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual método na classe Validador é usado para verificar se uma string contém apenas números?",
-        "options": ["isNumeric", "isNumber", "onlyDigits", "hasNumbers"],
-        "correctAnswer": "isNumeric",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual o nome do pacote da classe Aluno?",
-        "options": ["br.com.escola.projeto.models", "br.com.escola.projeto.services", "br.com.escola.projeto.views", "br.com.escola.projeto.repositories"],
-        "correctAnswer": "br.com.escola.projeto.models",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que o método 'salvar' da interface AlunoRepository recebe como parâmetro?",
-        "options": ["Um objeto completo do tipo Aluno", "Apenas o número de ID do aluno", "Uma String contendo o nome do aluno", "Uma lista com todos os alunos atuais"],
-        "correctAnswer": "Um objeto completo do tipo Aluno",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual o tipo de retorno do método 'remover' na interface AlunoRepository?",
-        "options": ["boolean", "void", "int", "String"],
-        "correctAnswer": "boolean",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que a palavra-chave 'this' refere-se dentro de um construtor?",
-        "options": ["Refere-se à instância atual do objeto que está sendo criado", "Indica a superclasse (classe pai) da classe atual", "Acessa uma variável estática compartilhada entre todos os objetos", "Aponta para o pacote onde a classe está localizada"],
-        "correctAnswer": "Refere-se à instância atual do objeto que está sendo criado",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que a classe 'Optional' representa?",
-        "options": ["Um objeto contêiner que pode ou não conter um valor não-nulo", "Uma lista de opções de múltipla escolha para o usuário", "Um tipo de dado que não exige a alocação de memória", "Uma classe que oferece métodos para validar entradas"],
-        "correctAnswer": "Um objeto contêiner que pode ou não conter um valor não-nulo",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "No menu de AlunoView, qual opção busca um aluno pela matrícula?",
-        "options": ["4", "3", "5", "6"],
-        "correctAnswer": "4",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Que tipo de exceção é capturada no método 'main' se o usuário digitar um texto em vez de um número?",
-        "options": ["NumberFormatException", "IllegalArgumentException", "IOException", "NullPointerException"],
-        "correctAnswer": "NumberFormatException",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual método é chamado no objeto 'alunoView' dentro do 'main' para iniciar a interação com o usuário?",
-        "options": ["mostrarMenu()", "start()", "run()", "init()"],
-        "correctAnswer": "mostrarMenu()",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que o método 'scanner.close()' faz?",
-        "options": ["Fecha o objeto Scanner e libera os recursos do sistema que ele estava usando", "Limpa o buffer de entrada do scanner para a próxima leitura de dados", "Reinicia o scanner para o início do fluxo de entrada de dados", "Faz uma pausa na execução do programa aguardando uma nova entrada"],
-        "correctAnswer": "Fecha o objeto Scanner e libera os recursos do sistema que ele estava usando",
-        "difficulty": "Fácil"
-    },
-    # =================================================================
-    # == NÍVEL MÉDIO (30 PERGUNTAS) ==
-    # =================================================================
-    {
-        "question": "Por que os métodos na classe Validador são declarados como 'static'?",
-        "options": ["Para que possam ser chamados sem a necessidade de criar uma instância da classe", "Para que seu valor seja compartilhado e sincronizado entre múltiplas threads", "Para impedir que classes filhas possam sobrescrever sua implementação", "Para garantir que a alocação de memória para eles seja mais eficiente"],
-        "correctAnswer": "Para que possam ser chamados sem a necessidade de criar uma instância da classe",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual a finalidade de usar Optional<Aluno> como tipo de retorno em métodos de busca?",
-        "options": ["Para tratar explicitamente a possibilidade de um resultado não ser encontrado, evitando NullPointerException", "Para retornar uma lista de alunos onde cada um pode ser nulo ou não", "Para otimizar a performance da consulta em bancos de dados relacionais", "Para forçar o desenvolvedor a usar um bloco try-catch ao chamar o método"],
-        "correctAnswer": "Para tratar explicitamente a possibilidade de um resultado não ser encontrado, evitando NullPointerException",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Na classe Main, como o programa decide qual implementação de AlunoRepository utilizar?",
-        "options": ["O usuário escolhe entre 'Vetor' ou 'Lista' através de um menu no console", "O sistema operacional determina a melhor implementação em tempo de execução", "É usada a implementação 'Lista' por padrão em todas as execuções", "O programa verifica qual arquivo de configuração (.properties) está presente"],
-        "correctAnswer": "O usuário escolhe entre 'Vetor' ou 'Lista' através de um menu no console",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Explique o que a linha 'scanner.nextLine();' faz logo após 'scanner.nextInt();' em AlunoView.",
-        "options": ["Consome o caractere de nova linha (\\n) que ficou no buffer de entrada", "Lê a próxima linha de texto completa que o usuário digitar", "Ignora a entrada atual e avança para a próxima solicitação de dados", "Causa uma pausa de um segundo antes de prosseguir com a execução"],
-        "correctAnswer": "Consome o caractere de nova linha (\\n) que ficou no buffer de entrada",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Como o método 'salvar' da AlunoRepositoryLista garante que cada aluno tenha um ID único?",
-        "options": ["Incrementando uma variável de controle ('proximoId') a cada nova inserção", "Gerando um número de ID aleatório e verificando se ele já existe na lista", "Solicitando que o próprio usuário digite um número de ID que seja único", "Utilizando o hash do objeto Aluno como seu identificador único na lista"],
-        "correctAnswer": "Incrementando uma variável de controle ('proximoId') a cada nova inserção",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No método listarTodos de AlunoRepositoryLista, em que ordem os alunos são retornados?",
-        "options": ["São retornados em ordem alfabética, com base no nome", "São retornados na mesma ordem em que foram inseridos", "São retornados em ordem crescente, com base no ID", "São retornados em uma ordem completamente aleatória"],
-        "correctAnswer": "São retornados em ordem alfabética, com base no nome",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No AlunoRepositoryVetor, o que acontece se o método 'salvar' for chamado quando o vetor já estiver cheio?",
-        "options": ["Uma mensagem de erro é exibida e o aluno não é adicionado", "O tamanho do vetor é automaticamente dobrado para comportar mais alunos", "O aluno mais antigo da lista é substituído pelo novo aluno", "Uma exceção do tipo 'ArrayIndexOutOfBoundsException' é lançada"],
-        "correctAnswer": "Uma mensagem de erro é exibida e o aluno não é adicionado",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual tecnologia é usada na classe Validador para verificar os formatos de CPF e e-mail?",
-        "options": ["Expressões Regulares (Regex)", "Algoritmos de Inteligência Artificial", "Funções de Hash criptográficas", "Comparações de String simples e diretas"],
-        "correctAnswer": "Expressões Regulares (Regex)",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que a expressão 'alunos.stream()' faz nas implementações de AlunoRepository?",
-        "options": ["Cria um fluxo de dados (Stream) a partir da coleção para realizar operações", "Inicia a transmissão dos dados dos alunos através de uma conexão de rede", "Gera um arquivo de log com os detalhes de cada aluno da coleção", "Comprime a lista de alunos em um formato mais compacto para economizar espaço"],
-        "correctAnswer": "Cria um fluxo de dados (Stream) a partir da coleção para realizar operações",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Como o método 'remover' da classe AlunoRepositoryLista funciona?",
-        "options": ["Usa o método 'removeIf' da coleção para apagar o aluno com o ID correspondente", "Percorre a lista com um laço 'for' e remove o elemento pelo seu índice numérico", "Cria uma nova lista contendo todos os alunos, exceto aquele a ser removido", "Marca o aluno com um status 'removido' sem de fato tirá-lo da lista"],
-        "correctAnswer": "Usa o método 'removeIf' da coleção para apagar o aluno com o ID correspondente",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No método cadastrarAluno do AlunoService, qual verificação é feita imediatamente após validar os campos?",
-        "options": ["Verifica se a matrícula informada já está em uso por outro aluno", "Verifica se o nome do aluno já existe no repositório", "Confere se a idade do aluno está dentro de um limite permitido", "Salva o aluno no repositório antes de qualquer outra verificação"],
-        "correctAnswer": "Verifica se a matrícula informada já está em uso por outro aluno",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual o propósito do bloco 'switch' dentro do método mostrarMenu da AlunoView?",
-        "options": ["Direcionar o fluxo do programa para a ação escolhida pelo usuário", "Validar se a entrada do usuário é um número inteiro válido", "Alternar entre as implementações de repositório (Vetor ou Lista)", "Mudar a formatação visual do texto exibido no console"],
-        "correctAnswer": "Direcionar o fluxo do programa para a ação escolhida pelo usuário",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual a diferença na forma como 'buscarPorId' é implementado em AlunoRepositoryLista e AlunoRepositoryVetor?",
-        "options": ["A versão 'Lista' usa a API de Streams e filter, enquanto a 'Vetor' usa um laço 'for'", "A versão 'Lista' é mais rápida para poucos dados e a 'Vetor' para muitos", "Ambas as classes utilizam exatamente a mesma implementação com laço 'for'", "A 'Lista' usa busca binária, que é mais eficiente que a busca linear do 'Vetor'"],
-        "correctAnswer": "A versão 'Lista' usa a API de Streams e filter, enquanto a 'Vetor' usa um laço 'for'",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No método removerAluno de AlunoService, como ele informa à AlunoView se a operação foi bem-sucedida?",
-        "options": ["Retornando uma String com uma mensagem de sucesso ou de erro", "Retornando um valor booleano, 'true' para sucesso e 'false' para falha", "Lançando uma exceção customizada em caso de falha na remoção", "Imprimindo o resultado da operação diretamente no console"],
-        "correctAnswer": "Retornando uma String com uma mensagem de sucesso ou de erro",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual é o papel da classe ArrayList importada em AlunoRepositoryLista?",
-        "options": ["Fornecer uma estrutura de dados de lista com tamanho dinâmico", "Oferecer métodos estáticos para ordenação de arrays e listas", "Permitir a conversão de uma lista para um vetor (array) de tamanho fixo", "Servir como uma classe de utilitários para operações em listas"],
-        "correctAnswer": "Fornecer uma estrutura de dados de lista com tamanho dinâmico",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que a expressão 'Comparator.comparing(Aluno::getNome)' faz?",
-        "options": ["Cria um critério de comparação para ordenar objetos Aluno pelo nome", "Verifica se os nomes de dois objetos Aluno são exatamente iguais", "Converte o nome de um Aluno para letras maiúsculas para comparação", "Remove da lista todos os Alunos que possuem nomes duplicados"],
-        "correctAnswer": "Cria um critério de comparação para ordenar objetos Aluno pelo nome",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Como o método listarTodos em AlunoRepositoryVetor lida com as posições vazias (nulas) do array?",
-        "options": ["Cria um stream apenas da parte preenchida do vetor, ignorando o resto", "Percorre o vetor inteiro e adiciona uma verificação para pular elementos nulos", "Lança uma NullPointerException se um elemento nulo for encontrado", "Preenche as posições nulas com objetos Aluno vazios antes de retornar"],
-        "correctAnswer": "Cria um stream apenas da parte preenchida do vetor, ignorando o resto",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que o método 'valor.trim().isEmpty()' na classe Validador faz?",
-        "options": ["Remove espaços no início/fim e depois verifica se a string resultante está vazia", "Verifica se a string original contém apenas caracteres de espaço em branco", "Corta a string pela metade e verifica se a primeira parte dela está vazia", "Remove todos os espaços da string, inclusive os do meio, e a valida"],
-        "correctAnswer": "Remove espaços no início/fim e depois verifica se a string resultante está vazia",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Por que a classe AlunoService recebe um AlunoRepository em seu construtor?",
-        "options": ["Para aplicar injeção de dependência e desacoplar a lógica da persistência", "Para garantir que a mesma instância de repositório seja usada em toda a aplicação", "Para criar uma nova tabela no banco de dados quando a classe é instanciada", "Para inicializar o repositório com uma lista de alunos padrão para testes"],
-        "correctAnswer": "Para aplicar injeção de dependência e desacoplar a lógica da persistência",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No método 'buscarPorMatricula' de AlunoRepositoryLista, o que 'equalsIgnoreCase' faz?",
-        "options": ["Compara duas strings de texto ignorando se as letras são maiúsculas ou minúsculas", "Verifica se duas strings são exatamente idênticas, incluindo maiúsculas/minúsculas", "Testa se a string de matrícula possui um formato de caracteres válido", "Converte a string de matrícula para letras minúsculas antes de comparar"],
-        "correctAnswer": "Compara duas strings de texto ignorando se as letras são maiúsculas ou minúsculas",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual a primeira validação feita no método 'cadastrarAluno' da AlunoService?",
-        "options": ["Verifica se algum campo obrigatório (nome, matrícula, etc.) é nulo ou vazio", "Verifica se o campo de matrícula contém apenas caracteres numéricos", "Valida se o formato do CPF inserido segue o padrão correto", "Confere no repositório se a matrícula informada já existe"],
-        "correctAnswer": "Verifica se algum campo obrigatório (nome, matrícula, etc.) é nulo ou vazio",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que o método 'Integer.parseInt(scanner.nextLine())' na classe Main tenta fazer?",
-        "options": ["Converter a linha de texto lida do console em um número do tipo inteiro", "Transformar um número inteiro em uma representação de texto (String)", "Verificar se a linha de texto lida do console contém apenas dígitos", "Formatar um número inteiro com separadores de milhar para exibição"],
-        "correctAnswer": "Converter a linha de texto lida do console em um número do tipo inteiro",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual a função do 'return Optional.empty()'?",
-        "options": ["Indicar que uma busca terminou sem encontrar um resultado válido", "Retornar um erro explícito de 'valor não encontrado' para o chamador", "Devolver uma string de texto vazia como resultado padrão", "Retornar o valor nulo (null) de forma segura e explícita"],
-        "correctAnswer": "Indicar que uma busca terminou sem encontrar um resultado válido",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que a expressão 'Collectors.toList()' faz?",
-        "options": ["Agrupa os elementos de um Stream em uma nova instância de List", "Realiza a conversão de um vetor (array) para uma estrutura de List", "Aplica um filtro para remover elementos indesejados de uma List", "Imprime no console cada um dos elementos contidos em uma List"],
-        "correctAnswer": "Agrupa os elementos de um Stream em uma nova instância de List",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No método 'atualizar' de AlunoRepositoryLista, o que 'ifPresent' faz?",
-        "options": ["Executa um trecho de código somente se o Optional contiver um valor", "Verifica se o aluno está fisicamente presente na instituição", "Apresenta os dados formatados do aluno em uma caixa de diálogo", "Define o status de presença do aluno como verdadeiro no sistema"],
-        "correctAnswer": "Executa um trecho de código somente se o Optional contiver um valor",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Por que o método 'remover' de AlunoRepositoryVetor precisa de um segundo laço 'for'?",
-        "options": ["Para deslocar os elementos posteriores à posição removida, preenchendo o espaço", "Para confirmar se o aluno foi de fato removido da estrutura do vetor", "Para localizar o índice exato do aluno que precisa ser removido", "Para reordenar todos os elementos do vetor após a operação de remoção"],
-        "correctAnswer": "Para deslocar os elementos posteriores à posição removida, preenchendo o espaço",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "No método 'atualizarAluno' da AlunoService, qual a primeira coisa que ele faz após validar os novos dados?",
-        "options": ["Verifica se o aluno com o ID informado realmente existe no repositório", "Salva as novas informações diretamente no repositório de dados", "Cria um novo objeto Aluno com os dados que foram atualizados", "Confere se a nova matrícula informada já não está em uso por outro aluno"],
-        "correctAnswer": "Verifica se o aluno com o ID informado realmente existe no repositório",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que significa 'implements AlunoRepository' na declaração de uma classe?",
-        "options": ["Que a classe assume um 'contrato' de implementar todos os métodos da interface", "Que a classe está herdando todos os atributos e métodos da AlunoRepository", "Que a classe só pode ser instanciada a partir de uma AlunoRepository", "Que a classe está importando os pacotes da interface AlunoRepository"],
-        "correctAnswer": "Que a classe assume um 'contrato' de implementar todos os métodos da interface",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "Qual o propósito da variável 'totalAlunos' em AlunoRepositoryVetor?",
-        "options": ["Manter o controle do número de alunos atualmente no vetor", "Definir a capacidade máxima de alunos que o vetor pode armazenar", "Armazenar o valor do próximo ID de aluno a ser utilizado", "Calcular a média de notas de todos os alunos armazenados"],
-        "correctAnswer": "Manter o controle do número de alunos atualmente no vetor",
-        "difficulty": "Médio"
-    },
-    {
-        "question": "O que a expressão 'a -> a.getId() == id' é chamada em Java?",
-        "options": ["Uma expressão lambda", "Uma função anônima", "Um método aninhado", "Uma declaração de variável"],
-        "correctAnswer": "Uma expressão lambda",
-        "difficulty": "Médio"
-    },
-    # =================================================================
-    # == NÍVEL DIFÍCIL (30 PERGUNTAS) ==
-    # =================================================================
-    # (As perguntas de nível Difícil e Extremamente Difícil já possuem um bom equilíbrio no tamanho das alternativas)
-    # ... (O resto das perguntas permanece o mesmo) ...
-]
-
-# Adicionando as perguntas extras que você forneceu, também revisadas
-default_questions.extend([
-    {
-        "question": "O que o método getIdade() em Aluno.java retorna?",
-        "options": ["O valor do atributo idade do aluno", "Um booleano indicando se o aluno é maior de idade", "A data de nascimento formatada do aluno", "Converte a idade do aluno de inteiro para String"],
-        "correctAnswer": "O valor do atributo idade do aluno",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "No trecho this.nome = nome; o que o 'this' representa?",
-        "options": ["O atributo 'nome' da instância atual da classe", "Um novo objeto que está sendo passado como parâmetro", "Uma chamada a um método estático da própria classe", "O valor do parâmetro 'nome' recebido pelo método"],
-        "correctAnswer": "O atributo 'nome' da instância atual da classe",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "Qual o papel da anotação @Override em um método de repositório?",
-        "options": ["Indica que o método está implementando um requisito da interface", "Define uma consulta SQL que será executada automaticamente", "Cria um método vazio que deve ser preenchido posteriormente", "Executa o método de forma assíncrona em uma nova thread"],
-        "correctAnswer": "Indica que o método está implementando um requisito da interface",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O construtor AlunoRepositoryVetor(int tamanho) faz o quê?",
-        "options": ["Inicializa o vetor de alunos com um tamanho fixo predefinido", "Cria uma lista de alunos que cresce dinamicamente", "Converte um vetor de alunos em uma String formatada", "Gera automaticamente IDs para um número 'tamanho' de alunos"],
-        "correctAnswer": "Inicializa o vetor de alunos com um tamanho fixo predefinido",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O atributo private int indice = 0 em AlunoRepositoryVetor serve para?",
-        "options": ["Controlar em qual posição do vetor o próximo aluno será inserido", "Guardar a idade do último aluno que foi cadastrado no sistema", "Definir o tamanho máximo de alunos que o vetor pode comportar", "Contar quantos alunos foram aprovados ou reprovados na disciplina"],
-        "correctAnswer": "Controlar em qual posição do vetor o próximo aluno será inserido",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que acontece se o nome não for válido em AlunoService?",
-        "options": ["O aluno não é adicionado e uma mensagem de erro é retornada", "O aluno é adicionado ao sistema com um nome padrão 'sem nome'", "O aluno inválido é removido de uma lista de pré-cadastro", "A lista de alunos é ordenada para facilitar a busca manual"],
-        "correctAnswer": "O aluno não é adicionado e uma mensagem de erro é retornada",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O que verifica !nome.trim().isEmpty() no Validador?",
-        "options": ["Verifica se o nome, após remover espaços, não está vazio", "Confere se o nome é composto apenas por caracteres numéricos", "Testa se o valor da variável 'nome' é estritamente nulo", "Analisa se o nome contém algum tipo de caractere numérico"],
-        "correctAnswer": "Verifica se o nome, após remover espaços, não está vazio",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "System.out.println('1 - Cadastrar aluno'); em AlunoView faz o quê?",
-        "options": ["Exibe a opção '1 - Cadastrar aluno' no menu do console", "Executa a função para cadastrar um novo aluno no sistema", "Lê os dados do aluno que serão digitados a seguir", "Finaliza a execução do programa com código de saída 1"],
-        "correctAnswer": "Exibe a opção '1 - Cadastrar aluno' no menu do console",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "int idade = sc.nextInt(); lê qual tipo de dado?",
-        "options": ["Lê o próximo número inteiro da entrada do console", "Lê uma linha inteira de texto (String) do console", "Fecha a conexão do objeto Scanner com a entrada", "Verifica se a próxima entrada é um número ou texto"],
-        "correctAnswer": "Lê o próximo número inteiro da entrada do console",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "List<Aluno> alunos = service.listarAlunos(); obtém o quê?",
-        "options": ["Uma lista com todos os alunos cadastrados no sistema", "Um novo objeto Aluno com os dados preenchidos", "Um valor booleano indicando se a remoção foi bem-sucedida", "Uma validação dos nomes de todos os alunos na lista"],
-        "correctAnswer": "Uma lista com todos os alunos cadastrados no sistema",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O laço for (Aluno a : alunos) { ... } em AlunoView faz o quê?",
-        "options": ["Percorre a lista de alunos para imprimir o nome e a idade de cada um", "Remove da lista todos os alunos que atendem a um critério específico", "Cria novos objetos Aluno com base em uma lista de nomes e idades", "Ordena a lista de alunos em ordem alfabética antes de exibi-la"],
-        "correctAnswer": "Percorre a lista de alunos para imprimir o nome e a idade de cada um",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O comando alunos.add(aluno) faz o quê?",
-        "options": ["Adiciona um novo objeto aluno ao final da lista 'alunos'", "Remove um objeto aluno específico da lista 'alunos'", "Substitui toda a lista 'alunos' por uma nova coleção", "Retorna o número total de alunos presentes na lista"],
-        "correctAnswer": "Adiciona um novo objeto aluno ao final da lista 'alunos'",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O comando indice++; faz o quê?",
-        "options": ["Avança o valor da variável 'indice' em uma unidade", "Zera o valor do vetor a partir da posição 'indice'", "Cria uma nova instância a partir da classe 'indice'", "Remove um aluno da lista na posição 'indice'"],
-        "correctAnswer": "Avança o valor da variável 'indice' em uma unidade",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "No switch de AlunoView, o case 2 chama qual função?",
-        "options": ["A função para listar todos os alunos cadastrados", "A função para finalizar a execução do programa", "A função para remover um aluno com base no nome", "A função para cadastrar um novo aluno no sistema"],
-        "correctAnswer": "A função para listar todos os alunos cadastrados",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "repository = new AlunoRepositoryLista(); define o quê?",
-        "options": ["Que a persistência de dados usará uma lista de tamanho dinâmico", "Que será criado um vetor com um tamanho fixo para os dados", "Que todos os alunos serão removidos da base de dados atual", "Que um aluno padrão será criado para testes da aplicação"],
-        "correctAnswer": "Que a persistência de dados usará uma lista de tamanho dinâmico",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "repository = new AlunoRepositoryVetor(10); cria o quê?",
-        "options": ["Um repositório que armazena os alunos em um vetor de 10 posições", "Uma lista de alunos que pode crescer até o limite de 10 mil", "Um arquivo de texto chamado 'alunos.txt' com 10 linhas", "Uma conexão com um banco de dados SQL com um pool de 10 conexões"],
-        "correctAnswer": "Um repositório que armazena os alunos em um vetor de 10 posições",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O bloco default em um switch faz o quê?",
-        "options": ["É executado se nenhuma das outras opções (case) for atendida", "Define o valor padrão para todas as variáveis dentro do switch", "Sempre repete a última ação executada pelo usuário no menu", "Cria uma variável temporária para armazenar a opção do usuário"],
-        "correctAnswer": "É executado se nenhuma das outras opções (case) for atendida",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "new AlunoView().menu(); em Main.java faz o quê?",
-        "options": ["Cria uma nova instância de AlunoView e chama o método menu", "Finaliza o programa e exibe o menu de opções de saída", "Cria um novo aluno e o adiciona ao menu de visualização", "Valida a idade de todos os alunos antes de exibir o menu"],
-        "correctAnswer": "Cria uma nova instância de AlunoView e chama o método menu",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O método adicionar em AlunoRepositoryVetor faz o quê?",
-        "options": ["Insere um aluno na próxima posição livre e incrementa o índice", "Remove um aluno do vetor e reorganiza os elementos restantes", "Ordena todos os alunos no vetor com base no nome ou no ID", "Cria uma lista dinâmica a partir do conteúdo do vetor atual"],
-        "correctAnswer": "Insere um aluno na próxima posição livre e incrementa o índice",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "boolean continuar = true em AlunoView significa?",
-        "options": ["É uma variável de controle para manter o loop do menu em execução", "Conta o número de alunos que continuam ativos no sistema", "Cria um novo aluno com o status de 'continuar' como verdadeiro", "Declara um índice para percorrer a lista de alunos no menu"],
-        "correctAnswer": "É uma variável de controle para manter o loop do menu em execução",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O laço while (continuar) faz o quê?",
-        "options": ["Executa o bloco de código repetidamente enquanto 'continuar' for verdadeiro", "Executa o bloco de código apenas uma única vez e depois para", "Nunca executa o bloco de código, pois a condição é sempre falsa", "Encerra o programa se a variável 'continuar' for verdadeira"],
-        "correctAnswer": "Executa o bloco de código repetidamente enquanto 'continuar' for verdadeiro",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O contrato Aluno buscarPorNome(String nome); define o quê?",
-        "options": ["Um método que deve buscar e retornar um aluno com base no nome", "Um método que remove um aluno do repositório usando o nome", "Um método que retorna sempre uma lista vazia de alunos", "Um método que converte o nome de um aluno para maiúsculas"],
-        "correctAnswer": "Um método que deve buscar e retornar um aluno com base no nome",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O método buscarAlunoPorNome em Service retorna?",
-        "options": ["O objeto Aluno correspondente ao nome buscado, se existir", "Um valor booleano indicando se a remoção foi bem-sucedida", "Um novo objeto Aluno com o nome e a idade padrão", "Uma validação se a idade do aluno encontrado é válida"],
-        "correctAnswer": "O objeto Aluno correspondente ao nome buscado, se existir",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "System.out.println('Digite o nome para buscar:'); faz o quê?",
-        "options": ["Exibe uma mensagem no console instruindo o usuário", "Lê o nome que o usuário digitará em seguida no console", "Busca automaticamente por um aluno com o nome 'buscar'", "Finaliza o programa e exibe uma mensagem de despedida"],
-        "correctAnswer": "Exibe uma mensagem no console instruindo o usuário",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "service.buscarAlunoPorNome(nome); faz o quê?",
-        "options": ["Chama a camada de serviço para procurar um aluno pelo nome", "Remove um aluno do serviço usando o nome como critério", "Cria uma nova lista de alunos a partir do serviço", "Zera a idade de um aluno encontrado através do serviço"],
-        "correctAnswer": "Chama a camada de serviço para procurar um aluno pelo nome",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O if (encontrado != null) faz o quê?",
-        "options": ["Executa um bloco de código apenas se um aluno foi encontrado", "Sempre imprime os dados do aluno, mesmo que seja nulo", "Remove o aluno se ele foi encontrado na base de dados", "Cria um novo aluno se a busca não retornar resultado"],
-        "correctAnswer": "Executa um bloco de código apenas se um aluno foi encontrado",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O laço for em AlunoRepositoryLista com equals(nome) faz o quê?",
-        "options": ["Percorre a lista e retorna o aluno cujo nome corresponde ao buscado", "Cria um novo aluno na lista com o nome passado como parâmetro", "Remove da lista todos os alunos que não possuem o nome buscado", "Ordena a lista de alunos com base no nome fornecido"],
-        "correctAnswer": "Percorre a lista e retorna o aluno cujo nome corresponde ao buscado",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O for em AlunoRepositoryVetor até indice faz o quê?",
-        "options": ["Percorre as posições preenchidas do vetor em busca de um aluno", "Adiciona um novo aluno em cada posição do vetor até o índice", "Apaga todos os elementos do vetor até a posição 'indice'", "Cria uma nova lista a partir dos elementos do vetor"],
-        "correctAnswer": "Percorre as posições preenchidas do vetor em busca de um aluno",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O case 3 em AlunoView executa?",
-        "options": ["A funcionalidade de buscar um aluno pelo seu nome", "A funcionalidade de remover um aluno do sistema", "A funcionalidade de listar todos os alunos cadastrados", "A opção de sair do sistema e encerrar a aplicação"],
-        "correctAnswer": "A funcionalidade de buscar um aluno pelo seu nome",
-        "difficulty": "Fácil"
-    },
-    {
-        "question": "O case 0 em AlunoView faz?",
-        "options": ["Altera a variável de controle para encerrar o loop do menu", "Reinicia o menu principal, mostrando as opções novamente", "Executa a funcionalidade de cadastrar um novo aluno", "Chama o método para listar todos os alunos cadastrados"],
-        "correctAnswer": "Altera a variável de controle para encerrar o loop do menu",
-        "difficulty": "Fácil"
-    }
-])
-TIME_PER_QUESTION, WINNING_SCORE, PENALTY_POINTS = 30, 100, 5
+game_states: Dict[str, Room] = {}
+resumes = {"patched": 0, "snapshot": 0}
+metrics.Gauge("quiz_active_rooms", "Salas com estado de jogo neste worker.", lambda: len(game_states))
+metrics.Gauge("quiz_active_players", "Jogadores em salas deste worker.", lambda: sum(len(room) for room in game_states.values()))
+metrics.Gauge("quiz_players_away", "Jogadores desconectados dentro do prazo de reconexão.", lambda: sum(len(room.away) for room in game_states.values()))
+metrics.Counter("quiz_session_resumes_total", "Reconexões atendidas só com os patches perdidos.", lambda: resumes["patched"])
+metrics.Gauge("quiz_active_sockets", "Sockets de jogadores abertos neste worker.", lambda: sum(len(connections) for connections in manager.rooms.values()))
+metrics.Counter("quiz_question_cache_hits_total", "Acertos do cache de perguntas personalizadas.", lambda: question_cache.hits)
+metrics.Counter("quiz_question_cache_misses_total", "Faltas do cache de perguntas personalizadas.", lambda: question_cache.misses)
+metrics.Gauge("quiz_score_sink_pending", "Deltas de pontuação aguardando gravação.", lambda: len(score_sink.pending))
+metrics.Gauge("quiz_question_history_pending", "Jogadores com perguntas vistas aguardando gravação.", lambda: len(question_history.pending))
+metrics.Gauge("quiz_answer_log_pending", "Respostas aguardando gravação no log.", lambda: len(answer_log.pending))
+metrics.Gauge("quiz_timers_pending", "Temporizadores agendados na roda.", lambda: len(wheel))
+metrics.Gauge("quiz_room_bytes", "Memória aproximada ocupada pelas salas deste worker.", lambda: sum(room.approx_bytes() for room in game_states.values()))
+metrics.Counter("quiz_rooms_reclaimed_total", "Salas abandonadas ou paradas recolhidas pela varredura.", lambda: sum(reaper.reclaimed.values()))
+metrics.LabeledCounter("quiz_ws_rejected_total", "Conexões e frames recusados pelo controle de admissão.", "reason", lambda: admission.rejected)
+metrics.Gauge("quiz_asset_files", "Arquivos do frontend servidos pelo pipeline de assets.", lambda: assets.stats()["files"])
+metrics.Gauge("quiz_room_actor_queue", "Comandos aguardando nos atores das salas.", lambda: actors.stats()["queued"])
+TIME_PER_QUESTION, WINNING_SCORE, PENALTY_POINTS, REVEAL_DELAY = 30, 100, 5, 2
+# Segundos que um jogador desconectado mantém o lugar (e a pontuação) esperando reconectar; 0 desativa.
+RECONNECT_GRACE = float(os.environ.get("QUIZ_RECONNECT_GRACE", "15"))
+# Inclui o instante de início do turno ("ts") nas atualizações, para o benchmark de carga.
+TRACE_TIMESTAMPS = os.environ.get("QUIZ_TRACE_TIMESTAMPS") == "1"
 
 def create_new_game_state(room_id: str, host_name: str):
     if room_id not in game_states:
-        game_states[room_id] = {
-            "host": host_name, "players": {}, "scores": {}, "questions": list(default_questions),
-            "current_question": None, "current_player_index": 0, "timer_task": None, "game_started": False
-        }
+        game_states[room_id] = Room(room_id, host_name)
+
+async def load_custom_question_ids(player_ids: List[str]) -> List[int]:
+    # Conjuntos em cache saem direto da memória; os demais vêm numa única consulta.
+    # Os ids devolvidos já carregam uma referência no banco para quem chamou (a sala).
+    question_ids, missing = [], []
+    for player_id in player_ids:
+        cached = question_cache.get(player_id)
+        if cached is None: missing.append(player_id)
+        else:
+            bank.acquire(cached)
+            question_ids.extend(cached)
+    if missing:
+        tokens = {player_id: question_cache.begin(player_id) for player_id in missing}
+        grouped = await database.run_read(database.get_questions_by_players, missing)
+        for player_id in missing:
+            player_ids_in_bank = tuple(bank.add_custom(grouped.get(player_id, [])))
+            if question_cache.put(player_id, tokens[player_id], player_ids_in_bank): bank.acquire(player_ids_in_bank)
+            question_ids.extend(player_ids_in_bank)
+    return question_ids
+
+def discard_room(room: Room):
+    # Remove a sala deste worker e devolve ao banco as perguntas que o baralho dela referenciava.
+    room.cancel_timers()
+    del game_states[room.room_id]
+    bank.release(room.default_ids)
+    bank.release(room.custom_ids)
+    room.default_ids = room.custom_ids = ()
 
 async def start_game(room_id: str):
-    state = game_states.get(room_id)
-    if not state or state["game_started"] or len(state["players"]) < 2: return
-    for player_id in state["players"]:
-        player_questions = database.get_questions_by_player(player_id)
-        state["questions"].extend(player_questions)
-    state["game_started"] = True
+    room = game_states.get(room_id)
+    if not room or room.game_started or len(room) < 2: return
+    room.game_started = True
+    players = list(room.order)
+    room.custom_ids = tuple(await load_custom_question_ids(players))
+    seen = await question_history.seen_by(players)
+    # Perguntas que nenhum jogador da sala viu em partidas anteriores saem primeiro.
+    room.default_ids = bank.defaults.ids
+    bank.acquire(room.default_ids)
+    room.questions = bank.new_deck(room.custom_ids, seen)
     await next_turn(room_id, new_game=True)
 
 async def end_game_and_save_scores(room_id: str, winner: str):
-    state = game_states.get(room_id)
-    if not state: return
-    host_name = state["host"]
-    print(f"Fim de jogo na sala de '{host_name}'. Salvando pontuações...")
-    for player_id, score in state["scores"].items():
-        if score > 0: database.update_player_score(player_id, score, host_name)
+    room = game_states.get(room_id)
+    if not room: return
+    print(f"Fim de jogo na sala de '{room.host}'. Salvando pontuações...")
     await manager.broadcast(room_id, {"type": "gameOver", "winner": winner})
-    if room_id in game_states:
-        if game_states[room_id].get("timer_task"): game_states[room_id]["timer_task"].cancel()
-        del game_states[room_id]
+    # Remove a sala antes de gravar: nenhum outro evento pode encerrar o mesmo jogo de novo.
+    discard_room(room)
+    scores = {player_id: score for player_id, score in room.scores.items() if score > 0}
+    score_sink.add(room.host, scores)
 
+@metrics.timed(metrics.next_turn_seconds)
 async def next_turn(room_id: str, new_game: bool = False):
-    state = game_states.get(room_id)
-    if not state: return
-    if state["timer_task"]: state["timer_task"].cancel()
-    for player_id, score in state["scores"].items():
+    started_at = time.time()
+    room = game_states.get(room_id)
+    if not room: return
+    if room.turn_timer: room.turn_timer.cancel()
+    for player_id, score in room.scores.items():
         if score >= WINNING_SCORE:
             await end_game_and_save_scores(room_id, player_id)
             return
     if not new_game:
-        state["current_player_index"] = (state["current_player_index"] + 1) % len(state["players"])
-    if not state["questions"]:
-        winner = max(state["scores"], key=state["scores"].get) if state["scores"] else "Empate"
+        room.advance_turn()
+    if not room.questions:
+        winner = max(room.scores, key=room.scores.get) if room.scores else "Empate"
         await end_game_and_save_scores(room_id, winner)
         return
-    state["current_question"] = state["questions"].pop(random.randrange(len(state["questions"])))
-    state["timeRemaining"] = TIME_PER_QUESTION
-    await manager.broadcast(room_id, {"type": "gameStateUpdate", "state": get_public_state(room_id)})
-    state["timer_task"] = asyncio.create_task(timer(room_id))
+    room.current_question_id = room.questions.pop()
+    room.current_question = bank.get(room.current_question_id).public
+    question_history.mark(room.order, bank.question_key(room.current_question_id))
+    room.option_order = tuple(random.sample(range(len(room.current_question["options"])), len(room.current_question["options"])))
+    room.time_remaining = TIME_PER_QUESTION
+    room.turn_deadline = time.monotonic() + TIME_PER_QUESTION
+    room.answered = False
+    room.turn += 1
+    await broadcast_state(room_id, started_at)
+    room.turn_timer = wheel.call_at(room.turn_deadline, actors.submit, room_id, ("deadline", room.turn))
 
-async def timer(room_id: str):
-    try:
-        await asyncio.sleep(TIME_PER_QUESTION)
-        state = game_states.get(room_id)
-        if state:
-            players_list = list(state["players"].keys())
-            if players_list:
-                current_player_id = players_list[state["current_player_index"]]
-                state["scores"][current_player_id] = max(0, state["scores"][current_player_id] - PENALTY_POINTS)
-            await next_turn(room_id)
-    except asyncio.CancelledError: pass
-
-def get_public_state(room_id: str):
-    state = game_states.get(room_id, {})
-    return {
-        "players": state.get("players", {}), "scores": state.get("scores", {}),
-        "current_question": state.get("current_question"), "current_player_index": state.get("current_player_index", 0),
-        "timeRemaining": state.get("timeRemaining")
-    }
+async def turn_deadline(room_id: str):
+    # Um único temporizador por turno, no prazo (a roda nunca dispara antes). Os clientes contam o tempo
+    # sozinhos a partir do timeRemaining recebido no início do turno; nada é agendado por segundo.
+    room = game_states[room_id]
+    room.turn_timer = None
+    if room.order:
+        record_answer(room, room.current_player, False, timed_out=True)
+        room.add_score(room.current_player, -PENALTY_POINTS)
+    await next_turn(room_id)
 
-@app.websocket("/ws/{room_id}/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, room_id: str, client_id: str):
-    await manager.connect(websocket, room_id, client_id)
-    
+async def broadcast_state(room_id: str, trace_ts: float = None):
+    # Cada difusão incrementa a sequência da sala; clientes com delta recebem só o que mudou.
+    room = game_states.get(room_id)
+    if not room: return
+    public_states = {view: get_public_state(room, view) for view in STATE_VIEWS}
+    previous = room.public_snapshot
+    ops = {view: state_delta.diff(previous[view], public_states[view]) for view in STATE_VIEWS} if previous is not None else None
+    room.seq += 1
+    room.log_state(room.seq, ops)
+    room.public_snapshot = {view: state_delta.snapshot(public_state) for view, public_state in public_states.items()}
+    await manager.broadcast_state(room_id, room.seq, public_states, ops, trace_ts if TRACE_TIMESTAMPS else None)
+
+# "full": pergunta completa (clientes antigos); "ref": só a posição no banco padrão + ordem das opções,
+# resolvidas pelo cliente com o GET /bank da mesma versão.
+STATE_VIEWS = ("full", "ref")
+
+def get_public_state(room: Room, view: str = "full"):
+    if view == "ref":
+        question = bank.reference(room.current_question_id, room.option_order) if room.current_question_id is not None else None
+        public_state = room.public_state(question)
+        public_state["bankVersion"] = bank.defaults.version
+        return public_state
+    return room.public_state(room.current_question)
+
+def send_current_state(room: Room, client_id: str):
+    # Snapshot para quem entra, volta ou pede o estado no meio do turno, com o tempo restante de agora:
+    # o relógio do cliente recomeça de onde o turno está, não da duração inteira.
+    public_states = room.public_snapshot or {view: get_public_state(room, view) for view in STATE_VIEWS}
+    remaining = max(0, round(room.turn_deadline - time.monotonic())) if room.current_question is not None else None
+    manager.send_snapshot(room.room_id, client_id, room.seq, public_states, remaining)
+
+async def relay_to_owner(websocket: WebSocket, room_id: str, client_id: str):
+    # A sala pertence a outro worker: este processo só repassa os frames nos dois sentidos.
+    _, subprotocol = wire.negotiate(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    connection = Connection(websocket)
+    def deliver(message: dict):
+        if message["kind"] == "send": connection.send(message["data"])
+        elif message["kind"] == "send_bytes": connection.send(base64.b64decode(message["data"]))
+        else: connection.drop(message.get("code", 1000))
+    try: await backend.relay(websocket, room_id, client_id, deliver)
+    finally: connection.close()
+
+@metrics.timed(metrics.answer_seconds)
+async def submit_answer(room_id: str, client_id: str, answer: str):
+    room = game_states.get(room_id)
+    if not room or not room.order: return
+
+    if client_id == room.current_player and room.current_question and not room.answered:
+        room.answered = True
+        if room.turn_timer:
+            room.turn_timer.cancel()
+        correct_answer = room.current_question["correctAnswer"]
+        await manager.broadcast(room_id, {"type": "answerResult", "correctAnswer": correct_answer, "selectedAnswer": answer})
+        is_correct = answer == correct_answer
+        record_answer(room, client_id, is_correct)
+        room.add_score(client_id, 10 if is_correct else -PENALTY_POINTS)
+
+        # A pausa para revelar a resposta fica na roda de temporizadores, sem travar a leitura do socket.
+        room.turn_timer = wheel.call_later(REVEAL_DELAY, actors.submit, room_id, ("next_turn", room.turn))
+
+def record_answer(room: Room, player: str, correct: bool, timed_out: bool = False):
+    # Só enfileira; o tempo de resposta é medido no servidor, desde o início do turno.
+    answer_log.record(room.room_id, player, *bank.question_key(room.current_question_id), room.current_question["difficulty"], correct, timed_out,
+                      TIME_PER_QUESTION - (room.turn_deadline - time.monotonic()))
+
+async def player_joined(room_id: str, client_id: str, since: int = None):
     # Cria um novo estado de jogo se a sala for nova
     if room_id not in game_states:
         create_new_game_state(room_id, client_id)
-    
-    state = game_states[room_id]
-    player_just_joined = False
-    
-    # Adiciona o novo jogador se ele não estiver na sala
-    if client_id not in state["players"]:
-        state["players"][client_id] = {"name": client_id}
-        state["scores"][client_id] = 0
-        player_just_joined = True
+    room = game_states[room_id]
+
+    # Jogador que já estava na sala (voltando dentro do prazo ou trocando de socket): retoma o lugar
+    # e recebe só os patches que perdeu, se o log ainda cobrir o seu último seq.
+    handle = room.away.pop(client_id, None)
+    if handle: handle.cancel()
+    if client_id in room.players and room.public_snapshot:
+        events = room.events_since(since) if since is not None else None
+        if events is not None and manager.resume(room_id, client_id, events):
+            resumes["patched"] += 1
+        else:
+            resumes["snapshot"] += 1
+            send_current_state(room, client_id)
+        return
 
     # Se um jogador acabou de entrar e o jogo ainda não começou, atualiza o lobby
-    if player_just_joined and not state["game_started"]:
-        await manager.broadcast(room_id, {"type": "gameStateUpdate", "state": get_public_state(room_id)})
+    if room.add_player(client_id) and not room.game_started:
+        await broadcast_state(room_id)
+    elif room.public_snapshot:
+        # Entrou com o jogo em andamento: recebe o estado atual.
+        send_current_state(room, client_id)
 
     # Tenta iniciar o jogo. A função só prosseguirá se houver 2 ou mais jogadores.
     await start_game(room_id)
 
+async def player_disconnected(room_id: str, client_id: str):
+    # O lugar fica reservado por RECONNECT_GRACE segundos; o jogo segue (e o turno dele pode expirar).
+    room = game_states.get(room_id)
+    if not room or client_id not in room.players: return
+    if RECONNECT_GRACE <= 0:
+        await player_left(room_id, client_id)
+        return
+    deadline = time.monotonic() + RECONNECT_GRACE
+    room.away[client_id] = wheel.call_at(deadline, actors.submit, room_id, ("expire", client_id, deadline))
+
+async def player_left(room_id: str, client_id: str):
+    room = game_states.get(room_id)
+    # Verifica se o cliente desconectado era de fato um jogador
+    if not room or not room.remove_player(client_id):
+        return
+    handle = room.away.pop(client_id, None)
+    if handle: handle.cancel()
+
+    # Lobby que ficou vazio: a sala é descartada na hora, sem esperar a varredura.
+    if not room.game_started and not len(room):
+        discard_room(room)
+        return
+
+    # CONDIÇÃO 1: O jogo estava em andamento e agora não há jogadores suficientes.
+    if room.game_started and len(room) < 2:
+        if room.turn_timer:
+            room.turn_timer.cancel()
+        await end_game_and_save_scores(room_id, "Jogo encerrado por desconexão")
+        return  # Encerra o jogo e a função
+
+    # CONDIÇÃO 2: O jogo continua (no lobby ou com jogadores suficientes); o índice do
+    # jogador da vez já foi ajustado pelo modelo. Envia a atualização para os jogadores restantes.
+    await broadcast_state(room_id)
+
+async def handle_command(room_id: str, command: tuple):
+    # Executado pelo ator da sala, um comando por vez: é o único lugar que altera o estado de uma sala.
+    kind = command[0]
+    room = game_states.get(room_id)
+    if room and kind != "reap": room.last_activity = time.monotonic()
+    if kind == "join":
+        await player_joined(room_id, command[1], command[2])
+    elif kind == "leave":
+        await player_disconnected(room_id, command[1])
+    elif kind == "expire":
+        # Prazo de reconexão esgotado; ignorado se o jogador voltou (e talvez caiu de novo) nesse meio-tempo.
+        handle = room.away.get(command[1]) if room else None
+        if handle and handle.deadline == command[2]: await player_left(room_id, command[1])
+    elif kind == "answer":
+        await submit_answer(room_id, command[1], command[2])
+    elif kind == "snapshot":
+        # O cliente detectou um buraco na sequência de patches.
+        if room: send_current_state(room, command[1])
+    elif kind == "reap":
+        await reap_room(room_id, command[1])
+    elif kind in ("deadline", "next_turn"):
+        # Temporizadores carregam o turno em que foram agendados; os de um turno já encerrado são ignorados.
+        if not room or room.turn != command[1]: return
+        if kind == "next_turn": await next_turn(room_id)
+        elif not room.answered: await turn_deadline(room_id)
+
+async def reap_room(room_id: str, reason: str):
+    # Confere de novo: algum comando pode ter chegado entre a varredura e este ponto.
+    room = game_states.get(room_id)
+    if not room or reaper.reason(room, time.monotonic()) != reason: return
+    print(f"Sala de '{room.host}' recolhida ({reason}).")
+    reaper.reclaimed[reason] += 1
+    if room.game_started:
+        # Jogo parado: encerra normalmente, preservando as pontuações já conquistadas.
+        await end_game_and_save_scores(room_id, "Jogo encerrado por inatividade")
+    else:
+        discard_room(room)
+    # Sockets que ainda restarem são fechados (depois do gameOver, se houver); como saem do gerenciador
+    # antes, não geram comandos de saída.
+    for connection in manager.rooms.pop(room_id, {}).values(): connection.finish(1001)
+
+@app.websocket("/ws/{room_id}/{client_id}")
+async def websocket_endpoint(websocket: WebSocket, room_id: str, client_id: str):
+    if not backend.owns(room_id):
+        await relay_to_owner(websocket, room_id, client_id)
+        return
+    room, sockets = game_states.get(room_id), manager.rooms.get(room_id)
+    rejected = admission.admit(len(game_states), room is None and sockets is None,
+                               max(len(room) if room else 0, len(sockets) if sockets else 0),
+                               bool(room and client_id in room.players or sockets and client_id in sockets))
+    if rejected:
+        # Recusado ainda no handshake: nenhuma conexão, fila ou estado é criado.
+        await websocket.close(code=CLOSE_CODES[rejected])
+        return
+    await manager.connect(websocket, room_id, client_id, delta=websocket.query_params.get("delta") == "1",
+                          bank_version=websocket.query_params.get("qref") or None)
+    # O loop de leitura só interpreta e enfileira; o ator da sala aplica os comandos em ordem.
+    since = websocket.query_params.get("since", "")
+    actors.submit(room_id, ("join", client_id, int(since) if since.isdigit() else None))
+    bucket, close_code = TokenBucket(), None
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            state = game_states.get(room_id)
-            if not state: break
-            
-            if message["type"] == "submitAnswer":
-                players_list = list(state["players"].keys())
-                if not players_list: continue
-                current_player_id = players_list[state["current_player_index"]]
-                
-                if client_id == current_player_id:
-                    if state.get("timer_task"):
-                        state["timer_task"].cancel()
-                    is_correct = message["answer"] == state["current_question"]["correctAnswer"]
-                    await manager.broadcast(room_id, {"type": "answerResult", "correctAnswer": state["current_question"]["correctAnswer"], "selectedAnswer": message["answer"]})
-                    
-                    if is_correct:
-                        state["scores"][client_id] += 10
-                    else:
-                        state["scores"][client_id] = max(0, state["scores"][client_id] - PENALTY_POINTS)
-                    
-                    await asyncio.sleep(2)
-                    await next_turn(room_id)
-
-    except WebSocketDisconnect:
-        # Lógica de desconexão aprimorada
-        manager.disconnect(room_id, client_id)
-        state = game_states.get(room_id)
-        if not state:
-            return
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect": break
+            text = frame.get("text")
+            # Tamanho e taxa são conferidos antes do parse; frames recusados são descartados.
+            # Frames binários não fazem parte do protocolo: contam como mensagem inválida.
+            rejected = admission.check_frame(bucket, text) if text is not None else admission.reject("bad_message")
+            if rejected is None:
+                try:
+                    message = json.loads(text)
+                    kind = message["type"]
+                    if kind == "submitAnswer" and not isinstance(message["answer"], str): raise TypeError
+                except (ValueError, TypeError, KeyError):
+                    rejected = admission.reject("bad_message")
+                else:
+                    if kind == "requestSnapshot":
+                        actors.submit(room_id, ("snapshot", client_id))
+                    elif kind == "submitAnswer":
+                        actors.submit(room_id, ("answer", client_id, message["answer"]))
+                    continue
+            if rejected == "frame_too_large" or admission.strike(bucket):
+                close_code = CLOSE_CODES.get(rejected, CLOSE_CODES["closed"])
+                break
+    finally:
+        # Qualquer saída do loop, inclusive por exceção, tira a conexão da sala; um socket antigo,
+        # substituído por uma reconexão com o mesmo id, não tira o jogador.
+        if manager.disconnect(room_id, client_id, websocket):
+            actors.submit(room_id, ("leave", client_id))
+    if close_code:
+        try: await websocket.close(code=close_code)
+        except Exception: pass
 
-        # Verifica se o cliente desconectado era de fato um jogador
-        if client_id in state["players"]:
-            del state["players"][client_id]
-            del state["scores"][client_id]
-
-            # CONDIÇÃO 1: O jogo estava em andamento e agora não há jogadores suficientes.
-            if state["game_started"] and len(state["players"]) < 2:
-                if state.get("timer_task"):
-                    state["timer_task"].cancel()
-                await end_game_and_save_scores(room_id, "Jogo encerrado por desconexão")
-                return  # Encerra o jogo e a função
-
-            # CONDIÇÃO 2: O jogo continua (no lobby ou com jogadores suficientes).
-            # Garante que o índice do jogador atual seja válido.
-            if state["players"]:
-                state["current_player_index"] %= len(state["players"])
-            
-            # Envia a atualização para os jogadores restantes.
-            await manager.broadcast(room_id, {"type": "gameStateUpdate", "state": get_public_state(room_id)})
\ No newline at end of file
+if __name__ == "__main__":
+    # Com o uvicorn na linha de comando, o equivalente é --ws-max-size (ver admission.WS_MAX_SIZE).
+    import uvicorn
+    uvicorn.run("main:app", host=os.environ.get("QUIZ_HOST", "127.0.0.1"), port=int(os.environ.get("QUIZ_PORT", "8000")),
+                workers=backend.workers, ws_max_size=WS_MAX_SIZE)
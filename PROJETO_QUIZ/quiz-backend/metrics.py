@@ -0,0 +1,111 @@
+# metrics.py
+# Métricas no formato de texto do Prometheus, sem dependências externas.
+# Nos caminhos quentes só há incrementos e um bisect; gauges são calculados apenas na coleta,
+# e o medidor de atraso do event loop só roda enquanto alguém estiver coletando /metrics.
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry: List = []
+
+class Counter:
+    __slots__ = ("name", "help", "value", "fn")
+    def __init__(self, name: str, help: str, fn: Callable[[], float] = None):
+        self.name, self.help, self.value, self.fn = name, help, 0, fn
+        _registry.append(self)
+    def inc(self, amount: int = 1): self.value += amount
+    def render(self) -> List[str]:
+        value = self.fn() if self.fn else self.value
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {value}"]
+
+class LabeledCounter:
+    # Uma série por valor do rótulo; fn devolve {valor: contagem}.
+    __slots__ = ("name", "help", "label", "fn")
+    def __init__(self, name: str, help: str, label: str, fn: Callable[[], Dict[str, float]]):
+        self.name, self.help, self.label, self.fn = name, help, label, fn
+        _registry.append(self)
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                *(f'{self.name}{{{self.label}="{key}"}} {value}' for key, value in self.fn().items())]
+
+class Gauge:
+    __slots__ = ("name", "help", "value", "fn")
+    def __init__(self, name: str, help: str, fn: Callable[[], float] = None):
+        self.name, self.help, self.value, self.fn = name, help, 0.0, fn
+        _registry.append(self)
+    def set(self, value: float): self.value = value
+    def render(self) -> List[str]:
+        value = self.fn() if self.fn else self.value
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+class Histogram:
+    __slots__ = ("name", "help", "buckets", "counts", "sum", "count")
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name, self.help, self.buckets = name, help, buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum, self.count = 0.0, 0
+        _registry.append(self)
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines += [f"{self.name}_sum {self.sum}", f"{self.name}_count {self.count}"]
+        return lines
+
+def timed(histogram: Histogram):
+    # Decorador para corrotinas: observa a duração total, inclusive quando há retorno antecipado.
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try: return await fn(*args, **kwargs)
+            finally: histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def render() -> str:
+    loop_lag.touch()
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+broadcast_seconds = Histogram("quiz_broadcast_fanout_seconds", "Tempo para serializar e enfileirar um broadcast para a sala.")
+next_turn_seconds = Histogram("quiz_next_turn_seconds", "Duração de next_turn.")
+answer_seconds = Histogram("quiz_answer_processing_seconds", "Tempo de processamento de um submitAnswer.")
+sqlite_read_seconds = Histogram("quiz_sqlite_read_seconds", "Latência das leituras no SQLite (fila + execução).")
+sqlite_write_seconds = Histogram("quiz_sqlite_write_seconds", "Latência das escritas no SQLite (fila + execução).")
+timer_overshoot_seconds = Histogram("quiz_timer_overshoot_seconds", "Atraso entre o prazo de um temporizador e o disparo.")
+event_loop_lag_seconds = Histogram("quiz_event_loop_lag_seconds", "Atraso do event loop medido enquanto /metrics é coletado.")
+slow_client_drops = Counter("quiz_slow_client_drops_total", "Conexões fechadas por fila de saída cheia.")
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.5, idle_after: float = 120.0):
+        self.interval, self.idle_after = interval, idle_after
+        self.last_scrape = 0.0
+        self._task = None
+        self.gauge = Gauge("quiz_event_loop_lag_last_seconds", "Última medição de atraso do event loop.")
+
+    def touch(self):
+        self.last_scrape = time.monotonic()
+        if self._task is None or self._task.done():
+            try: self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError: pass
+
+    async def _run(self):
+        while time.monotonic() - self.last_scrape < self.idle_after:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.gauge.set(lag)
+            event_loop_lag_seconds.observe(lag)
+
+loop_lag = LoopLagMonitor()
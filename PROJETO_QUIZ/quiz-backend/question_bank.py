@@ -0,0 +1,265 @@
+# question_bank.py
+# Banco de perguntas único e somente leitura, compartilhado por todas as salas.
+# Cada sala guarda apenas um array compacto de índices, embaralhado uma vez e consumido com pop().
+# As perguntas padrão vêm de questions.json (ou QUIZ_QUESTIONS_FILE), carregado só no primeiro uso
+# e recarregado quando o arquivo muda. A recarga troca o conjunto padrão inteiro.
+# Cada pergunta padrão tem um "id" estável no arquivo, que identifica a pergunta nas estatísticas
+# de respostas mesmo que o arquivo seja reordenado ou ganhe e perca perguntas.
+# Cada registro tem uma contagem de referências (conjunto padrão, entradas do question_cache, salas em
+# jogo) e é liberado quando ninguém mais o usa: salas já em jogo continuam com as perguntas que sortearam,
+# e versões antigas de perguntas editadas ou do arquivo padrão não ficam para sempre na memória.
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import unicodedata
+from array import array
+import bitset
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_QUESTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.json")
+# Limite dos ids estáveis do arquivo padrão, que são as posições de bit no histórico dos jogadores
+# (question_history): pequenos e densos, como as posições no arquivo.
+MAX_DEFAULT_KEY = 1 << 16
+
+class QuestionRecord:
+    __slots__ = ("id", "question", "options", "correct_answer", "difficulty", "origin", "public")
+    def __init__(self, id: int, question: str, options: Iterable[str], correct_answer: str, difficulty: str, origin: Tuple[str, int]):
+        self.id, self.question, self.options = id, question, tuple(options)
+        self.correct_answer, self.difficulty, self.origin = correct_answer, difficulty, origin
+        # Formato enviado aos clientes, montado uma única vez; nunca deve ser alterado.
+        self.public = {"id": id, "question": question, "options": list(self.options), "correctAnswer": correct_answer, "difficulty": difficulty}
+
+def shuffled_options(question: str, options: Iterable[str]) -> Tuple[str, ...]:
+    # Ordem canônica das opções, embaralhada por hash do conteúdo: a mesma em todos os workers e para qualquer
+    # ordem de entrada. No arquivo e no banco a resposta correta vem primeiro; aqui a posição dela não diz nada.
+    return tuple(sorted(options, key=lambda option: hashlib.sha256(f"{question}\0{option}".encode()).digest()))
+
+def _words(text: str) -> Tuple[str, ...]:
+    # Minúsculas, sem acentos e quebrado em \w+ como database.search_terms e o tokenizador unicode61 do FTS5:
+    # "@Override" e "Optional<T>" viram palavras soltas.
+    text = unicodedata.normalize("NFKD", text.lower())
+    return tuple(re.findall(r"\w+", "".join(c for c in text if not unicodedata.combining(c))))
+
+def _public(n: int, r: QuestionRecord) -> Dict:
+    # Campos que podem sair do servidor fora de uma partida: sem a resposta correta.
+    return {"id": n, "question": r.question, "options": list(r.options), "difficulty": r.difficulty}
+
+def _serialize(items: Iterable[Tuple[int, QuestionRecord]]) -> Tuple[str, bytes]:
+    # Exportação pública (sem as respostas corretas), versionada por hash do conteúdo.
+    questions = [_public(n, r) for n, r in items]
+    body = json.dumps(questions, separators=(",", ":"), ensure_ascii=False)
+    version = hashlib.sha256(body.encode()).hexdigest()[:16]
+    return version, f'{{"version":"{version}","questions":{body}}}'.encode()
+
+class DefaultSet:
+    # Conjunto padrão imutável. Os ids públicos (GET /bank e referências ?qref=) são posições neste
+    # conjunto, iguais em todos os workers; os ids internos dependem da ordem de carga de cada processo.
+    # `keys` leva cada id interno ao id estável do arquivo e `by_key` faz o caminho inverso.
+    __slots__ = ("ids", "positions", "keys", "by_key", "slots", "mask", "by_difficulty", "source_hash", "version", "payload", "_filtered", "_words")
+    def __init__(self, records: Dict[int, QuestionRecord], ids: Iterable[int], source_hash: str, keys: Iterable[int]):
+        # Pergunta repetida no arquivo fica com o id estável da primeira ocorrência.
+        self.keys: Dict[int, int] = {}
+        for question_id, key in zip(ids, keys): self.keys.setdefault(question_id, key)
+        self.by_key = {key: question_id for question_id, key in self.keys.items()}
+        self.ids = tuple(self.keys)
+        self.positions = {question_id: n for n, question_id in enumerate(self.ids)}
+        # slots[id estável] = id interno (None onde o arquivo não tem pergunta), para separar as perguntas pelos
+        # bits do histórico; `mask` tem os bits de todos os ids estáveis, para complementá-lo.
+        slots: List[Optional[int]] = [None] * (max(self.by_key, default=-1) + 1)
+        for key, question_id in self.by_key.items(): slots[key] = question_id
+        self.slots = tuple(slots)
+        self.mask = 0
+        for key in self.by_key: self.mask |= 1 << key
+        by_difficulty: Dict[str, List[int]] = {}
+        for question_id in self.ids: by_difficulty.setdefault(records[question_id].difficulty, []).append(question_id)
+        self.by_difficulty = {difficulty: tuple(ids) for difficulty, ids in by_difficulty.items()}
+        self.source_hash = source_hash
+        self.version, self.payload = _serialize((n, records[i]) for n, i in enumerate(self.ids))
+        self._filtered: Dict[str, Tuple[str, bytes]] = {}
+        self._words: Optional[List[Tuple[str, ...]]] = None
+
+    def export_difficulty(self, records: Dict[int, QuestionRecord], difficulty: str) -> Tuple[str, bytes]:
+        cached = self._filtered.get(difficulty)
+        if cached is None:
+            ids = self.by_difficulty.get(difficulty, ())
+            cached = self._filtered[difficulty] = _serialize((self.positions[i], records[i]) for i in ids)
+        return cached
+
+    def search(self, records: Dict[int, QuestionRecord], terms: List[str], difficulty: str = None, after: int = -1, limit: int = 20) -> List[Dict]:
+        # Poucas centenas de perguntas: varredura linear em memória, com as palavras normalizadas uma vez.
+        if self._words is None:
+            self._words = [_words(" ".join((records[i].question,) + records[i].options)) for i in self.ids]
+        terms = [word for term in terms for word in _words(term)]
+        results = []
+        for position in range(after + 1, len(self.ids)):
+            record = records[self.ids[position]]
+            if difficulty is not None and record.difficulty != difficulty: continue
+            words = self._words[position]
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                results.append(_public(position, record))
+                if len(results) == limit: break
+        return results
+
+class QuestionBank:
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get("QUIZ_QUESTIONS_FILE", DEFAULT_QUESTIONS_FILE)
+        self.records: Dict[int, QuestionRecord] = {}
+        self._by_content: Dict[tuple, int] = {}
+        self._refs: Dict[int, int] = {}
+        # Ids nunca são reaproveitados: um id guardado em algum lugar não passa a apontar para outra pergunta.
+        self._next_id = itertools.count()
+        self.released = 0
+        self._defaults: Optional[DefaultSet] = None
+        self._signature = None
+        self._watcher: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    def intern(self, question: str, options: Iterable[str], correct_answer: str, difficulty: str, origin: Tuple[str, int]) -> int:
+        # Perguntas idênticas (inclusive de autores diferentes) compartilham o mesmo registro.
+        # Cada chamada conta uma referência, que quem chamou devolve com release().
+        # As opções ficam na ordem canônica, a única que sai do servidor (GET /bank, referências, busca, turnos).
+        options = shuffled_options(question, options)
+        key = (question, options, correct_answer, difficulty)
+        question_id = self._by_content.get(key)
+        if question_id is None:
+            question_id = next(self._next_id)
+            self.records[question_id] = QuestionRecord(question_id, question, options, correct_answer, difficulty, origin)
+            self._by_content[key] = question_id
+        self._refs[question_id] = self._refs.get(question_id, 0) + 1
+        return question_id
+
+    def acquire(self, ids: Iterable[int]):
+        refs = self._refs
+        for question_id in ids: refs[question_id] += 1
+
+    def release(self, ids: Iterable[int]):
+        refs = self._refs
+        for question_id in ids:
+            count = refs[question_id] - 1
+            if count:
+                refs[question_id] = count
+                continue
+            del refs[question_id]
+            record = self.records.pop(question_id)
+            del self._by_content[(record.question, record.options, record.correct_answer, record.difficulty)]
+            self.released += 1
+
+    @property
+    def defaults(self) -> DefaultSet:
+        if self._defaults is None: self.reload()
+        return self._defaults
+
+    def load_defaults(self, questions: List[Dict], source_hash: str = ""):
+        keys = [q["id"] for q in questions]
+        if not all(type(key) is int and 0 <= key < MAX_DEFAULT_KEY for key in keys):
+            raise ValueError(f"ids do arquivo padrão devem ser inteiros entre 0 e {MAX_DEFAULT_KEY - 1}")
+        if len(set(keys)) < len(keys): raise ValueError("ids repetidos no arquivo padrão")
+        ids: List[int] = []
+        try:
+            for key, q in zip(keys, questions): ids.append(self.intern(q["question"], q["options"], q["correctAnswer"], q["difficulty"], ("default", key)))
+        except Exception:
+            # Arquivo inválido no meio do caminho: devolve o que já foi internado e mantém o conjunto atual.
+            self.release(ids)
+            raise
+        defaults = DefaultSet(self.records, ids, source_hash, keys)
+        if len(defaults.ids) < len(ids):
+            # Perguntas repetidas no arquivo entram uma vez só no conjunto, que guarda uma referência de cada.
+            self.acquire(defaults.ids)
+            self.release(ids)
+        previous, self._defaults = self._defaults, defaults
+        # Perguntas que continuam no arquivo já ganharam a nova referência acima e não são liberadas.
+        if previous is not None: self.release(previous.ids)
+
+    def reload(self) -> bool:
+        # Relê o arquivo se mudou desde a última carga; um arquivo inválido mantém o conjunto atual.
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature and self._defaults is not None: return False
+            with open(self.path, "rb") as f: raw = f.read()
+            self._signature = signature
+            source_hash = hashlib.sha256(raw).hexdigest()
+            if self._defaults is not None and source_hash == self._defaults.source_hash: return False
+            self.load_defaults(json.loads(raw), source_hash)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if self._defaults is None: raise
+            print(f"Erro ao recarregar o banco de perguntas ({self.path}): {e}")
+            return False
+        self.reloads += 1
+        print(f"Banco de perguntas carregado: {len(self._defaults.ids)} perguntas (versão {self._defaults.version}).")
+        return True
+
+    def start(self, interval: float = 2.0):
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(interval))
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            # Nada a vigiar enquanto o banco não foi usado; a primeira carga continua preguiçosa.
+            if self._defaults is not None: self.reload()
+
+    async def stop(self):
+        if self._watcher:
+            self._watcher.cancel()
+            try: await self._watcher
+            except asyncio.CancelledError: pass
+            self._watcher = None
+
+    def export(self, ids: Iterable[int]) -> Tuple[str, bytes]:
+        return _serialize((n, self.records[i]) for n, i in enumerate(ids))
+
+    def reference(self, question_id: int, order: Iterable[int]) -> Dict:
+        # Referência enviada aos clientes com ?qref=; perguntas fora do conjunto padrão atual
+        # (personalizadas ou de uma versão anterior do arquivo) vão completas.
+        position = self.defaults.positions.get(question_id)
+        if position is not None: return {"id": position, "order": list(order)}
+        record = self.records[question_id]
+        return {"question": record.question, "options": list(record.options), "difficulty": record.difficulty, "order": list(order)}
+
+    def add_custom(self, questions: List[Dict]) -> List[int]:
+        # Recebe perguntas no formato de database.get_questions_by_player(s).
+        # As padrão são internadas antes de qualquer personalizada.
+        if self._defaults is None: self.reload()
+        return [self.intern(q["question"], q["options"], q["correctAnswer"], q["difficulty"], ("custom", q["id"])) for q in questions]
+
+    def get(self, question_id: int) -> QuestionRecord:
+        return self.records[question_id]
+
+    def question_key(self, question_id: int) -> Tuple[str, int]:
+        # Chave estável da pergunta nas estatísticas de respostas e no histórico dos jogadores: ("default", id no
+        # arquivo padrão) ou ("custom", id no banco de dados). Uma pergunta de uma versão anterior do arquivo mantém o seu id.
+        key = self.defaults.keys.get(question_id)
+        if key is not None: return "default", key
+        return self.records[question_id].origin
+
+    def new_deck(self, extra_ids: Iterable[int] = (), seen: Tuple[int, Set[int]] = (0, frozenset())) -> array:
+        # `seen` é o que algum jogador da sala já viu: (bitset de ids estáveis padrão, ids personalizados).
+        # As inéditas vão para o fim do array, que é consumido com pop(): saem primeiro.
+        defaults = self.defaults
+        seen_default, seen_custom = seen
+        stale = bitset.partition(defaults.slots, seen_default & defaults.mask)[0]
+        fresh = bitset.partition(defaults.slots, defaults.mask & ~seen_default)[0]
+        included = set(defaults.ids)
+        for question_id in extra_ids:
+            if question_id in included: continue
+            included.add(question_id)
+            origin = self.records[question_id].origin
+            (stale if origin[0] == "custom" and origin[1] in seen_custom else fresh).append(question_id)
+        random.shuffle(stale)
+        random.shuffle(fresh)
+        deck = array("I", stale)
+        deck.extend(fresh)
+        return deck
+
+    def stats(self) -> Dict:
+        defaults = self._defaults
+        return {"loaded": defaults is not None, "records": len(self.records), "released": self.released, "reloads": self.reloads,
+                "questions": len(defaults.ids) if defaults else 0, "version": defaults.version if defaults else None,
+                "by_difficulty": {d: len(ids) for d, ids in defaults.by_difficulty.items()} if defaults else {}}
+
+bank = QuestionBank()
@@ -0,0 +1,58 @@
+# question_cache.py
+# Cache LRU/TTL, em processo, do conjunto de perguntas personalizadas de cada jogador,
+# guardado como ids do banco compartilhado (question_bank). Invalidado pelas rotas /questions.
+# Cada entrada guarda uma referência aos seus registros no banco, devolvida por on_evict quando ela sai.
+import itertools
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+class QuestionSetCache:
+    def __init__(self, max_entries: int = 2048, ttl: float = 600.0):
+        self.max_entries, self.ttl = max_entries, ttl
+        self.hits = self.misses = self.invalidations = 0
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[int, ...]]]" = OrderedDict()
+        # Buscas em andamento: uma invalidação no meio do caminho impede que o resultado antigo seja guardado.
+        self._pending: Dict[str, int] = {}
+        self._tokens = itertools.count(1)
+        # Ligado na inicialização (QuestionBank.release); recebe os ids de cada entrada removida.
+        self.on_evict: Optional[Callable[[Iterable[int]], None]] = None
+
+    def get(self, player_name: str) -> Optional[Tuple[int, ...]]:
+        entry = self._entries.get(player_name)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None: self._evict(self._entries.pop(player_name))
+            self.misses += 1
+            return None
+        self._entries.move_to_end(player_name)
+        self.hits += 1
+        return entry[1]
+
+    def begin(self, player_name: str) -> int:
+        token = self._pending[player_name] = next(self._tokens)
+        return token
+
+    def put(self, player_name: str, token: int, question_ids: Tuple[int, ...]) -> bool:
+        # True se a entrada foi guardada; só então o cache passa a manter uma referência aos ids.
+        if self._pending.get(player_name) != token: return False
+        del self._pending[player_name]
+        previous = self._entries.pop(player_name, None)
+        if previous is not None: self._evict(previous)
+        self._entries[player_name] = (time.monotonic() + self.ttl, question_ids)
+        while len(self._entries) > self.max_entries: self._evict(self._entries.popitem(last=False)[1])
+        return True
+
+    def invalidate(self, player_name: str):
+        self._pending.pop(player_name, None)
+        entry = self._entries.pop(player_name, None)
+        if entry is not None:
+            self._evict(entry)
+            self.invalidations += 1
+
+    def _evict(self, entry: Tuple[float, Tuple[int, ...]]):
+        if self.on_evict: self.on_evict(entry[1])
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+question_cache = QuestionSetCache()
@@ -0,0 +1,54 @@
+# question_history.py
+# Histórico de perguntas já vistas por jogador, entre partidas, pela chave estável de bank.question_key():
+# o banco padrão num bitset indexado pelo id de questions.json (ids pequenos e densos) e as personalizadas
+# num conjunto de ids do banco de dados (esparsos: o tamanho depende do que o jogador viu, não do maior id
+# da tabela). As marcações de cada turno só acumulam em memória e são gravadas em lote, mescladas com
+# união, como no ScoreSink.
+from typing import Dict, Iterable, List, Set, Tuple
+import bitset
+import database
+from batch_writer import BatchWriter
+
+class QuestionHistory(BatchWriter):
+    # Marcações ainda não gravadas em `pending`: jogador -> [bitset padrão, set de ids personalizados].
+    label = "histórico de perguntas"
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 2000):
+        super().__init__(flush_interval, max_pending)
+
+    def mark(self, players: Iterable[str], key: Tuple[str, int]):
+        source, question_key = key
+        bit = 1 << question_key
+        for player in players:
+            entry = self.pending.get(player)
+            if entry is None: entry = self.pending[player] = [0, set()]
+            if source == "default": entry[0] |= bit
+            else: entry[1].add(question_key)
+        self.wake_if_full()
+
+    async def seen_by(self, players: List[str]) -> Tuple[int, Set[int]]:
+        # União do que qualquer um dos jogadores já viu (gravado + pendente).
+        stored = await database.run_read(database.get_question_history, players)
+        seen_default, seen_custom = 0, set()
+        for player in players:
+            blobs = stored.get(player)
+            if blobs:
+                seen_default |= bitset.from_blob(blobs[0])
+                seen_custom |= bitset.ids_from_blob(blobs[1])
+            entry = self.pending.get(player)
+            if entry:
+                seen_default |= entry[0]
+                seen_custom |= entry[1]
+        return seen_default, seen_custom
+
+    async def write(self, batch: Dict[str, list]):
+        rows = [(player, bitset.to_blob(seen[0]), bitset.ids_to_blob(seen[1])) for player, seen in batch.items()]
+        await database.run_write(database.merge_question_history, rows)
+
+    def restore(self, batch: Dict[str, list]):
+        for player, seen in batch.items():
+            entry = self.pending.setdefault(player, [0, set()])
+            entry[0] |= seen[0]
+            entry[1] |= seen[1]
+
+question_history = QuestionHistory()
@@ -0,0 +1,90 @@
+# question_io.py
+# Importação e exportação em massa de perguntas personalizadas, em NDJSON ou CSV, sem carregar o
+# arquivo inteiro: a entrada é lida em blocos e cada registro sai assim que fica completo.
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+FORMATS = ("ndjson", "csv")
+CSV_COLUMNS = ("question_text", "correct_answer", "incorrect_answer_1", "incorrect_answer_2", "incorrect_answer_3", "difficulty")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def detect_format(content_type: str, requested: Optional[str]) -> Optional[str]:
+    if requested: return requested if requested in FORMATS else None
+    if "csv" in content_type: return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type: return "ndjson"
+    return None
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Quebra o fluxo de bytes em linhas (com o terminador), decodificando UTF-8 de forma incremental.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete: yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending: yield pending
+
+async def records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    # Produz (linha, registro, erro) no formato do modelo Question; linhas em branco são ignoradas.
+    line_no = 0
+    if fmt == "ndjson":
+        async for line in _lines(chunks):
+            line_no += 1
+            if not line.strip(): continue
+            try: yield line_no, json.loads(line), None
+            except ValueError as e: yield line_no, None, f"JSON inválido: {e}"
+        return
+    header, buffer, start = None, "", 0
+    async for line in _lines(chunks):
+        line_no += 1
+        if not buffer: start = line_no
+        buffer += line
+        # Campo entre aspas com quebra de linha: o registro só termina com um número par de aspas.
+        if buffer.count('"') % 2: continue
+        record, buffer = buffer, ""
+        if not record.strip(): continue
+        try: row = next(csv.reader([record]))
+        except csv.Error as e:
+            yield start, None, f"CSV inválido: {e}"
+            continue
+        if header is None:
+            header = [column.strip() for column in row]
+            missing = [column for column in CSV_COLUMNS if column not in header]
+            if missing:
+                yield start, None, f"Cabeçalho sem as colunas: {', '.join(missing)}"
+                return
+            continue
+        if len(row) != len(header):
+            yield start, None, f"Esperadas {len(header)} colunas, recebidas {len(row)}"
+            continue
+        values = dict(zip(header, row))
+        yield start, {
+            "question_text": values["question_text"], "correct_answer": values["correct_answer"],
+            "incorrect_answers": [values["incorrect_answer_1"], values["incorrect_answer_2"], values["incorrect_answer_3"]],
+            "difficulty": values["difficulty"],
+        }, None
+    if buffer: yield start, None, "CSV inválido: aspas não fechadas no fim do arquivo"
+
+def _incorrect(q: Dict) -> List[str]:
+    # As opções vêm embaralhadas; as incorretas são as que sobram ao tirar uma ocorrência da resposta correta.
+    options = list(q["options"])
+    options.remove(q["correctAnswer"])
+    return options
+
+def encode(questions: Iterable[Dict], fmt: str, header: bool = False) -> str:
+    # Recebe perguntas no formato de database.get_questions_page e devolve o trecho de saída correspondente.
+    if fmt == "ndjson":
+        return "".join(json.dumps({
+            "id": q["id"], "question_text": q["question"], "correct_answer": q["correctAnswer"],
+            "incorrect_answers": _incorrect(q), "difficulty": q["difficulty"],
+        }, ensure_ascii=False) + "\n" for q in questions)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if header: writer.writerow(("id",) + CSV_COLUMNS)
+    for q in questions:
+        writer.writerow((q["id"], q["question"], q["correctAnswer"], *_incorrect(q), q["difficulty"]))
+    return out.getvalue()
@@ -0,0 +1,133 @@
+# room.py
+# Modelo de uma sala de jogo. A ordem dos turnos é uma lista explícita e o jogador da vez é só um índice
+# nela; os dicionários `players_view` e `scores` já estão no formato enviado aos clientes e são mantidos
+# a cada entrada, saída e pontuação, sem reconstrução por turno ou por difusão.
+# Cada sala guarda também os últimos patches difundidos, para retomar clientes que reconectam.
+import sys
+import time
+from array import array
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+EVENT_LOG_SIZE = 64
+
+class Player:
+    __slots__ = ("name", "public")
+    def __init__(self, name: str):
+        self.name = name
+        self.public = {"name": name}
+
+class Room:
+    __slots__ = (
+        "room_id", "host", "players", "order", "players_view", "scores", "current_index",
+        "questions", "current_question", "current_question_id", "option_order", "default_ids", "custom_ids", "bank_export",
+        "time_remaining", "turn_deadline", "turn_timer", "turn", "answered", "game_started",
+        "seq", "public_snapshot", "events", "away", "last_activity",
+    )
+
+    def __init__(self, room_id: str, host: str):
+        self.room_id, self.host = room_id, host
+        self.players: Dict[str, Player] = {}
+        self.order: List[str] = []
+        self.players_view: Dict[str, dict] = {}
+        self.scores: Dict[str, int] = {}
+        self.current_index = 0
+        self.questions = array("I")
+        self.current_question: Optional[dict] = None
+        self.current_question_id: Optional[int] = None
+        self.option_order: Tuple[int, ...] = ()
+        # Ids do banco referenciados pelo baralho (ver QuestionBank.acquire), devolvidos quando a sala sai.
+        self.default_ids: Tuple[int, ...] = ()
+        self.custom_ids: Tuple[int, ...] = ()
+        self.bank_export: Optional[Tuple[str, bytes]] = None
+        self.time_remaining: Optional[int] = None
+        self.turn_deadline = 0.0
+        self.turn_timer = None
+        # Número do turno atual: temporizadores agendados num turno anterior são ignorados.
+        self.turn = 0
+        self.answered = False
+        self.game_started = False
+        self.seq = 0
+        self.public_snapshot: Optional[Dict[str, dict]] = None
+        # (seq, ops por visão) dos últimos patches, em sequência contínua.
+        self.events: Deque[Tuple[int, Dict[str, list]]] = deque(maxlen=EVENT_LOG_SIZE)
+        # Jogadores desconectados que ainda guardam o lugar: nome -> temporizador do fim da tolerância.
+        self.away: Dict[str, object] = {}
+        # Último comando processado pelo ator (time.monotonic()), para recolher salas paradas.
+        self.last_activity = time.monotonic()
+
+    def __len__(self): return len(self.order)
+
+    @property
+    def current_player(self) -> Optional[str]:
+        return self.order[self.current_index] if self.order else None
+
+    def add_player(self, name: str) -> bool:
+        if name in self.players: return False
+        player = self.players[name] = Player(name)
+        self.order.append(name)
+        self.players_view[name] = player.public
+        self.scores[name] = 0
+        return True
+
+    def remove_player(self, name: str) -> bool:
+        if name not in self.players: return False
+        index = self.order.index(name)
+        del self.players[name], self.players_view[name], self.scores[name], self.order[index]
+        # Quem saiu antes do jogador da vez não pode deslocar o turno para outra pessoa.
+        if index < self.current_index: self.current_index -= 1
+        elif self.current_index >= len(self.order): self.current_index = 0
+        return True
+
+    def advance_turn(self):
+        self.current_index = (self.current_index + 1) % len(self.order)
+
+    def cancel_timers(self):
+        if self.turn_timer: self.turn_timer.cancel()
+        for handle in self.away.values(): handle.cancel()
+        self.away.clear()
+
+    def approx_bytes(self) -> int:
+        # Estimativa do que só esta sala mantém vivo: o objeto, seus contêineres, baralho, exportação do
+        # banco e log de patches. Registros do banco de perguntas são compartilhados e não entram.
+        size = sys.getsizeof(self) + sys.getsizeof(self.questions) + sys.getsizeof(self.custom_ids) + sys.getsizeof(self.option_order)
+        for container in (self.players, self.order, self.players_view, self.scores, self.away, self.events):
+            size += sys.getsizeof(container)
+        for name, player in self.players.items():
+            size += sys.getsizeof(player) + sys.getsizeof(player.public) + sys.getsizeof(name)
+        if self.bank_export: size += sys.getsizeof(self.bank_export[1])
+        if self.public_snapshot: size += _deep_size(self.public_snapshot, {id(self.current_question)})
+        seen = {id(self.current_question)}
+        for _, ops in self.events: size += _deep_size(ops, seen)
+        return size
+
+    def add_score(self, name: str, points: int):
+        self.scores[name] = max(0, self.scores[name] + points)
+
+    def log_state(self, seq: int, ops: Optional[Dict[str, list]]):
+        # Um snapshot completo (ops=None) quebra a continuidade: patches anteriores não levam até ele.
+        if ops is None: self.events.clear()
+        else: self.events.append((seq, ops))
+
+    def events_since(self, seq: int) -> Optional[List[Tuple[int, Dict[str, list]]]]:
+        # Patches posteriores a `seq`, ou None se o log não cobre mais esse ponto.
+        if seq == self.seq: return []
+        if seq > self.seq or not self.events or self.events[0][0] > seq + 1: return None
+        return [event for event in self.events if event[0] > seq]
+
+    def public_state(self, current_question: Optional[dict]) -> dict:
+        return {
+            "players": self.players_view, "scores": self.scores, "current_question": current_question,
+            "current_player_index": self.current_index, "timeRemaining": self.time_remaining,
+        }
+
+def _deep_size(obj, seen: set) -> int:
+    # Soma recursiva de dicts/listas/tuplas, contando cada objeto uma única vez.
+    if id(obj) in seen: return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items(): size += _deep_size(key, seen) + _deep_size(value, seen)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj: size += _deep_size(item, seen)
+    return size
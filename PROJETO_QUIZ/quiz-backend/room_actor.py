@@ -0,0 +1,56 @@
+# room_actor.py
+# Um ator por sala: uma task que consome, em ordem, os comandos da sala (entrada, resposta, tique do
+# temporizador, saída...). Loops de leitura dos sockets e temporizadores apenas enfileiram; só o ator
+# altera o estado do jogo, então não há duas transições concorrentes na mesma sala.
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+class RoomActor:
+    __slots__ = ("room_id", "queue", "task")
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+class RoomActors:
+    def __init__(self):
+        # handler(room_id, command) processa um comando; is_active(room_id) diz se a sala ainda existe.
+        self.handler: Optional[Callable[[str, tuple], Awaitable]] = None
+        self.is_active: Callable[[str], bool] = lambda room_id: False
+        self.actors: Dict[str, RoomActor] = {}
+        self.processed = 0
+
+    def __len__(self): return len(self.actors)
+
+    def submit(self, room_id: str, command: tuple):
+        actor = self.actors.get(room_id)
+        if actor is None:
+            actor = self.actors[room_id] = RoomActor(room_id)
+            actor.task = asyncio.get_running_loop().create_task(self._run(actor))
+        actor.queue.put_nowait(command)
+
+    async def _run(self, actor: RoomActor):
+        while True:
+            command = await actor.queue.get()
+            try:
+                await self.handler(actor.room_id, command)
+            except Exception as e:
+                print(f"Erro na sala '{actor.room_id}' ao processar {command[0]}: {e}")
+            self.processed += 1
+            # Sem comandos pendentes e sem sala nem sockets: o ator se encerra. Não há await entre a
+            # verificação e a remoção, então nenhum comando novo pode cair num ator já encerrado.
+            if actor.queue.empty() and not self.is_active(actor.room_id):
+                del self.actors[actor.room_id]
+                return
+
+    async def close(self):
+        tasks = [actor.task for actor in self.actors.values()]
+        for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.actors.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"actors": len(self.actors), "queued": sum(actor.queue.qsize() for actor in self.actors.values()),
+                "processed": self.processed}
+
+actors = RoomActors()
@@ -0,0 +1,241 @@
+# room_backend.py
+# Backend de salas e pub/sub entre workers.
+#
+# LocalBackend (padrão): um único processo, tudo em memória.
+# UnixSocketBackend (QUIZ_WORKERS > 1): cada sala tem um worker dono (crc32(room_id) % N).
+# Um worker que recebe o socket de uma sala alheia apenas o repassa ao dono por sockets Unix
+# de datagrama; o dono roda a lógica do jogo normalmente sobre um RelayedWebSocket.
+# Só o WebSocket é repassado: GET /rooms/{room_id}/bank, que depende do estado da sala, responde 501 nesse modo.
+import asyncio
+import base64
+import fcntl
+import json
+import os
+import socket
+import uuid
+import zlib
+from typing import Callable, Dict, List, Optional
+from admission import admission, MAX_FRAME_SIZE, CLOSE_CODES
+
+# Maior datagrama enviado de uma vez; acima disso (EMSGSIZE) a mensagem vai em fragmentos "#origem índice total\n".
+MAX_DATAGRAM = 65536
+
+class LocalBackend:
+    worker_id, workers = 0, 1
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable]] = {}
+        # Chamado no dono quando um socket remoto entra numa sala: (websocket, room_id, client_id).
+        self.on_remote_connection: Optional[Callable] = None
+
+    def owns(self, room_id: str) -> bool: return True
+
+    def owner_of(self, room_id: str) -> int: return 0
+
+    def subscribe(self, event: str, callback: Callable):
+        self._subscribers.setdefault(event, []).append(callback)
+
+    def publish(self, event: str, data):
+        self._dispatch(event, data)
+
+    def _dispatch(self, event: str, data):
+        for callback in self._subscribers.get(event, ()): callback(data)
+
+    async def start(self): pass
+
+    async def stop(self): pass
+
+class RelayedWebSocket:
+    # Visto pelo worker dono como um WebSocket comum; os frames vão e voltam pelo worker de borda.
+    def __init__(self, backend: "UnixSocketBackend", origin: int, conn_id: str, params: Dict[str, str], subprotocols: List[str]):
+        self.backend, self.origin, self.conn_id = backend, origin, conn_id
+        self.query_params = params
+        self.scope = {"subprotocols": subprotocols}
+        self.inbox: asyncio.Queue = asyncio.Queue()
+    async def accept(self, subprotocol: str = None): pass
+    async def receive(self) -> Dict:
+        # Mensagens no formato ASGI, como as de WebSocket.receive().
+        return await self.inbox.get()
+    async def send_text(self, data: str):
+        self.backend.send(self.origin, {"kind": "send", "conn": self.conn_id, "data": data})
+    async def send_bytes(self, data: bytes):
+        self.backend.send(self.origin, {"kind": "send_bytes", "conn": self.conn_id, "data": base64.b64encode(data).decode()})
+    async def close(self, code: int = 1000):
+        self.backend.send(self.origin, {"kind": "drop", "conn": self.conn_id, "code": code})
+
+class UnixSocketBackend(LocalBackend):
+    def __init__(self, workers: int, relay_dir: str, worker_id: int = None):
+        super().__init__()
+        self.workers, self.relay_dir, self.worker_id = workers, relay_dir, worker_id
+        self._sock: Optional[socket.socket] = None
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._sender: Optional[asyncio.Task] = None
+        self.remote: Dict[str, RelayedWebSocket] = {}
+        # Sockets locais repassados a outro worker: conn_id -> função que enfileira frames para o cliente.
+        self.edges: Dict[str, Callable] = {}
+        self.dropped = 0
+        # Fragmentos recebidos por worker de origem. Cada worker envia por uma só task e o socket Unix preserva
+        # a ordem, então os fragmentos de uma mensagem chegam seguidos.
+        self._parts: Dict[int, List[bytes]] = {}
+
+    def owner_of(self, room_id: str) -> int:
+        return zlib.crc32(room_id.encode()) % self.workers
+
+    def owns(self, room_id: str) -> bool:
+        return self.owner_of(room_id) == self.worker_id
+
+    def _path(self, worker_id: int) -> str:
+        return os.path.join(self.relay_dir, f"worker-{worker_id}.sock")
+
+    def _bind(self) -> socket.socket:
+        os.makedirs(self.relay_dir, mode=0o700, exist_ok=True)
+        # Os workers sobem juntos: sem o lock, dois deles podem achar o mesmo arquivo órfão e um apagar o
+        # socket que o outro acabou de criar nele.
+        with open(os.path.join(self.relay_dir, "bind.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._bind_locked()
+
+    def _bind_locked(self) -> socket.socket:
+        candidates = [self.worker_id] if self.worker_id is not None else range(self.workers)
+        for worker_id in candidates:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            path = self._path(worker_id)
+            try:
+                sock.bind(path)
+            except OSError:
+                # Arquivo de um processo que morreu: ninguém responde nele, então pode ser reaproveitado.
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                try:
+                    probe.connect(path)
+                    sock.close()
+                    continue
+                except ConnectionRefusedError:
+                    os.unlink(path)
+                    sock.bind(path)
+                finally:
+                    probe.close()
+            sock.setblocking(False)
+            self.worker_id = worker_id
+            return sock
+        raise RuntimeError(f"Nenhuma vaga livre entre os {self.workers} workers em {self.relay_dir}")
+
+    async def start(self):
+        self._sock = self._bind()
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._on_readable)
+        self._sender = asyncio.create_task(self._drain())
+        print(f"Worker {self.worker_id}/{self.workers} escutando em {self._path(self.worker_id)}")
+
+    async def stop(self):
+        if self._sock is None: return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        if self._sender: self._sender.cancel()
+        self._sock.close()
+        try: os.unlink(self._path(self.worker_id))
+        except FileNotFoundError: pass
+        self._sock = None
+
+    def send(self, worker_id: int, message: dict):
+        payload = json.dumps(message).encode()
+        datagrams = [payload]
+        if len(payload) > MAX_DATAGRAM:
+            chunks = [payload[i:i + MAX_DATAGRAM] for i in range(0, len(payload), MAX_DATAGRAM)]
+            datagrams = [b"#%d %d %d\n" % (self.worker_id, index, len(chunks)) + chunk for index, chunk in enumerate(chunks)]
+        self._outbox.put_nowait((worker_id, datagrams))
+
+    def publish(self, event: str, data):
+        self._dispatch(event, data)
+        for worker_id in range(self.workers):
+            if worker_id != self.worker_id: self.send(worker_id, {"kind": "event", "event": event, "data": data})
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            worker_id, datagrams = await self._outbox.get()
+            try:
+                for datagram in datagrams: await loop.sock_sendto(self._sock, datagram, self._path(worker_id))
+            except OSError:
+                # Worker de destino fora do ar: o frame é descartado, como num cliente desconectado.
+                self.dropped += 1
+
+    def _on_readable(self):
+        while True:
+            try: payload = self._sock.recv(262144)
+            except (BlockingIOError, OSError): return
+            try:
+                if payload[:1] == b"#": payload = self._reassemble(payload)
+                if payload is not None: self._handle(json.loads(payload))
+            except Exception as e: print(f"Erro no relay entre workers: {e}")
+
+    def _reassemble(self, datagram: bytes) -> Optional[bytes]:
+        # Devolve a mensagem completa no último fragmento. Um envio interrompido no meio deixa fragmentos
+        # órfãos, descartados quando chega o primeiro fragmento da mensagem seguinte.
+        header, chunk = datagram[1:].split(b"\n", 1)
+        origin, index, count = map(int, header.split())
+        if index == 0: self._parts[origin] = []
+        parts = self._parts.get(origin)
+        if parts is None or len(parts) != index: return None
+        parts.append(chunk)
+        if index + 1 < count: return None
+        del self._parts[origin]
+        return b"".join(parts)
+
+    def _handle(self, message: dict):
+        kind = message["kind"]
+        if kind == "event":
+            self._dispatch(message["event"], message["data"])
+        elif kind == "open":
+            proxy = RelayedWebSocket(self, message["origin"], message["conn"], message["params"], message["subprotocols"])
+            self.remote[message["conn"]] = proxy
+            if self.on_remote_connection:
+                asyncio.create_task(self._serve(proxy, message["room"], message["client"]))
+        elif kind == "recv":
+            proxy = self.remote.get(message["conn"])
+            # Do frame binário só importa que existiu: o dono o recusa e conta contra a conexão.
+            if proxy: proxy.inbox.put_nowait({"type": "websocket.receive", "bytes": b""} if message.get("binary") else
+                                             {"type": "websocket.receive", "text": message["data"]})
+        elif kind == "close":
+            proxy = self.remote.pop(message["conn"], None)
+            if proxy: proxy.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        elif kind in ("send", "send_bytes", "drop"):
+            deliver = self.edges.get(message["conn"])
+            if deliver: deliver(message)
+
+    async def _serve(self, proxy: RelayedWebSocket, room_id: str, client_id: str):
+        try: await self.on_remote_connection(proxy, room_id, client_id)
+        finally:
+            # Como o Starlette faz com um socket real quando o endpoint retorna: fecha a ponta do cliente.
+            if self.remote.pop(proxy.conn_id, None): await proxy.close()
+
+    async def relay(self, websocket, room_id: str, client_id: str, deliver: Callable):
+        # Lado de borda: repassa ao dono tudo o que o cliente envia; os frames de volta chegam via `deliver`.
+        owner = self.owner_of(room_id)
+        conn_id = f"{self.worker_id}:{uuid.uuid4().hex}"
+        self.edges[conn_id] = deliver
+        self.send(owner, {"kind": "open", "origin": self.worker_id, "conn": conn_id, "room": room_id, "client": client_id,
+                          "params": dict(websocket.query_params), "subprotocols": list(websocket.scope.get("subprotocols", []))})
+        try:
+            while True:
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect": break
+                data = frame.get("text")
+                if data is None:
+                    self.send(owner, {"kind": "recv", "conn": conn_id, "binary": True})
+                    continue
+                # Frame grande demais nem atravessa para o dono, que o recusaria do mesmo jeito.
+                if len(data) > MAX_FRAME_SIZE:
+                    admission.reject("frame_too_large")
+                    await websocket.close(code=CLOSE_CODES["frame_too_large"])
+                    break
+                self.send(owner, {"kind": "recv", "conn": conn_id, "data": data})
+        finally:
+            del self.edges[conn_id]
+            self.send(owner, {"kind": "close", "conn": conn_id})
+
+def create_backend() -> LocalBackend:
+    workers = int(os.environ.get("QUIZ_WORKERS", "1"))
+    if workers <= 1: return LocalBackend()
+    worker_id = os.environ.get("QUIZ_WORKER_ID")
+    return UnixSocketBackend(workers, os.environ.get("QUIZ_RELAY_DIR", "/tmp/quiz-relay"),
+                             int(worker_id) if worker_id is not None else None)
+
+backend = create_backend()
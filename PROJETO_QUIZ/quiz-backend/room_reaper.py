@@ -0,0 +1,66 @@
+# room_reaper.py
+# Ciclo de vida das salas: uma varredura periódica encontra salas abandonadas (sem nenhum socket),
+# lobbies que nunca chegaram a dois jogadores e jogos parados (nenhum comando, ex.: temporizador perdido).
+# A varredura só enfileira ("reap", motivo) no ator da sala, que confere de novo e libera o estado;
+# a remoção nunca corre junto com outro comando da mesma sala.
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Optional
+from room import Room
+
+# Segundos sem nenhum comando até a sala ser recolhida, por situação.
+ABANDONED_TTL = float(os.environ.get("QUIZ_ROOM_ABANDONED_TTL", "60"))
+LOBBY_TTL = float(os.environ.get("QUIZ_ROOM_LOBBY_TTL", "1800"))
+GAME_TTL = float(os.environ.get("QUIZ_ROOM_GAME_TTL", "300"))
+
+class RoomReaper:
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        # Ligados na inicialização: salas deste worker, se há sockets abertos e o envio de comandos ao ator.
+        self.rooms: Dict[str, Room] = {}
+        self.is_connected: Callable[[str], bool] = lambda room_id: False
+        self.submit: Optional[Callable[[str, tuple], None]] = None
+        self.reclaimed = {"abandoned": 0, "lobby": 0, "stuck": 0}
+        self.sweeps = 0
+        self._task = None
+
+    def reason(self, room: Room, now: float) -> Optional[str]:
+        # Motivo para recolher a sala agora, ou None se ela ainda está em uso.
+        idle = now - room.last_activity
+        if not self.is_connected(room.room_id) and idle >= ABANDONED_TTL: return "abandoned"
+        if not room.game_started and idle >= LOBBY_TTL: return "lobby"
+        if room.game_started and idle >= GAME_TTL: return "stuck"
+        return None
+
+    def sweep(self) -> int:
+        now, found = time.monotonic(), 0
+        for room_id, room in list(self.rooms.items()):
+            reason = self.reason(room, now)
+            if reason:
+                self.submit(room_id, ("reap", reason))
+                found += 1
+        self.sweeps += 1
+        return found
+
+    def stats(self) -> Dict:
+        return {"sweeps": self.sweeps, "reclaimed": dict(self.reclaimed),
+                "ttl": {"abandoned": ABANDONED_TTL, "lobby": LOBBY_TTL, "game": GAME_TTL}}
+
+    def start(self):
+        if self._task is None: self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try: self.sweep()
+            except Exception as e: print(f"Erro na varredura de salas: {e}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+
+reaper = RoomReaper()
@@ -0,0 +1,38 @@
+# score_sink.py
+# Write-behind das pontuações do ranking: os fins de jogo só acumulam deltas em memória,
+# que são mesclados por (player_name, host_name) e gravados periodicamente numa única transação.
+from typing import Dict, Tuple
+import database
+from batch_writer import BatchWriter
+
+class ScoreSink(BatchWriter):
+    label = "pontuações"
+
+    def __init__(self, flush_interval: float = 1.0, max_pending: int = 5000):
+        super().__init__(flush_interval, max_pending)
+        # Callback opcional chamado com o lote já gravado e a nova versão do ranking de cada anfitrião.
+        self.on_flush = None
+
+    def add(self, host_name: str, scores: Dict[str, int]):
+        for player_name, score in scores.items():
+            key = (player_name, host_name)
+            self.pending[key] = self.pending.get(key, 0) + score
+        self.wake_if_full()
+
+    async def write(self, batch: Dict[Tuple[str, str], int]):
+        deltas = [(player, score, host) for (player, host), score in batch.items()]
+        return deltas, await database.run_write(database.apply_score_deltas, deltas)
+
+    def restore(self, batch: Dict[Tuple[str, str], int]):
+        for key, score in batch.items(): self.pending[key] = self.pending.get(key, 0) + score
+
+    def written(self, batch, result):
+        if self.on_flush: self.on_flush(*result)
+        print(f"Ranking: {len(batch)} pontuações gravadas em lote.")
+
+    async def close(self):
+        # Depois do flush final, checkpoint do WAL.
+        await super().close()
+        await database.run_write(database.checkpoint)
+
+score_sink = ScoreSink()
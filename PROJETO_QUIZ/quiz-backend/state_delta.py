@@ -0,0 +1,28 @@
+# state_delta.py
+# Deltas no estilo JSON Patch (RFC 6902) entre dois snapshots do estado público de uma sala.
+from typing import Any, Dict, List
+
+def escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def snapshot(value: Any) -> Any:
+    # Copia apenas os dicionários; listas e valores escalares são tratados como imutáveis.
+    if isinstance(value, dict): return {k: snapshot(v) for k, v in value.items()}
+    return value
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], path: str = "") -> List[Dict[str, Any]]:
+    ops = []
+    for key in old.keys() - new.keys():
+        ops.append({"op": "remove", "path": f"{path}/{escape(key)}"})
+    for key, value in new.items():
+        key_path = f"{path}/{escape(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": key_path, "value": value})
+            continue
+        previous = old[key]
+        if previous is value: continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            ops.extend(diff(previous, value, key_path))
+        elif previous != value:
+            ops.append({"op": "replace", "path": key_path, "value": value})
+    return ops
@@ -0,0 +1,203 @@
+# static_assets.py
+# Pipeline opcional dos arquivos do quiz-frontend (ativado com QUIZ_FRONTEND_DIR). Na inicialização, cada
+# arquivo ganha um nome com o hash do conteúdo (servido com cache imutável), variantes pré-comprimidas para
+# texto (gzip e, com o módulo brotli, br) e, com Pillow, versões redimensionadas e recomprimidas das imagens
+# (inclusive WebP). O index.html é reescrito para apontar para os nomes com hash e ganha srcset nas <img> que
+# declaram sizes. As variantes ficam em disco (QUIZ_ASSET_CACHE), indexadas pelo hash: um reinício sem
+# mudanças não recomprime nada. Na requisição nada é lido inteiro: FileResponse envia em blocos e trata Range.
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+FRONTEND_DIR = os.environ.get("QUIZ_FRONTEND_DIR")
+CACHE_DIR = os.environ.get("QUIZ_ASSET_CACHE", os.path.join(tempfile.gettempdir(), "quiz-assets"))
+INDEX = "index.html"
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# Larguras geradas para imagens maiores que elas; o tamanho original continua disponível.
+IMAGE_WIDTHS = (160, 320, 640)
+IMAGE_FORMATS = {"image/png": "PNG", "image/jpeg": "JPEG"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Uma variante comprimida só é mantida se economizar pelo menos esta fração do arquivo de origem.
+MIN_SAVING = 0.05
+
+class Variant:
+    __slots__ = ("path", "stat", "media_type", "encoding", "etag")
+    def __init__(self, path: str, media_type: str, encoding: Optional[str], etag: str):
+        self.path, self.media_type, self.encoding, self.etag = path, media_type, encoding, etag
+        self.stat = os.stat(path)
+
+class Asset:
+    __slots__ = ("name", "hashed_name", "digest", "media_type", "variants", "widths")
+    def __init__(self, name: str, digest: str, media_type: str):
+        stem, ext = os.path.splitext(name)
+        self.name, self.digest, self.media_type = name, digest, media_type
+        self.hashed_name = f"{stem}.{digest}{ext}"
+        # (largura ou None para o tamanho original, codificação/formato ou None para o original) -> variante.
+        self.variants: Dict[Tuple[Optional[int], Optional[str]], Variant] = {}
+        self.widths: List[int] = []
+
+    def add(self, width: Optional[int], kind: Optional[str], path: str, media_type: str = None, encoding: str = None):
+        tag = f"{self.digest}-{width or 'o'}-{kind or 'id'}"
+        self.variants[(width, kind)] = Variant(path, media_type or self.media_type, encoding, tag)
+        if width and width not in self.widths: self.widths.append(width)
+
+    @property
+    def vary(self) -> Optional[str]:
+        # Cabeçalho que decide entre as variantes no mesmo URL (a largura vem no próprio URL).
+        if (None, "webp") in self.variants: return "Accept"
+        return "Accept-Encoding" if any(kind in ("gzip", "br") for _, kind in self.variants) else None
+
+    def select(self, accept_encoding: Iterable[str], accept: str, width: Optional[int], ranged: bool) -> Variant:
+        if self.widths or (None, "webp") in self.variants:
+            # Menor largura que cobre a pedida; WebP para quem anuncia suporte.
+            size = min((w for w in self.widths if w >= width), default=None) if width else None
+            if "image/webp" in accept and (size, "webp") in self.variants: return self.variants[(size, "webp")]
+            return self.variants[(size, None)]
+        # Pedidos com Range recebem sempre a representação original (áudio, por exemplo, nunca é comprimido).
+        if not ranged:
+            for encoding in ("br", "gzip"):
+                if encoding in accept_encoding and (None, encoding) in self.variants: return self.variants[(None, encoding)]
+        return self.variants[(None, None)]
+
+def accepted_encodings(header: str) -> List[str]:
+    # Codificações aceitas, descartando as marcadas com q=0.
+    encodings = []
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"): encodings.append(token.lower())
+    return encodings
+
+def _digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""): sha.update(chunk)
+    return sha.hexdigest()[:12]
+
+class AssetPipeline:
+    def __init__(self, source_dir: Optional[str], cache_dir: str):
+        self.source_dir, self.cache_dir = source_dir, cache_dir
+        self.assets: Dict[str, Asset] = {}
+        self.built = self.reused = 0
+
+    @property
+    def enabled(self) -> bool: return bool(self.source_dir)
+
+    def get(self, name: str) -> Optional[Asset]:
+        return self.assets.get(name or INDEX)
+
+    def _output(self, name: str, produce) -> str:
+        # Gera o arquivo só se ainda não existe no cache; a escrita é atômica (arquivo temporário + rename).
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            self.reused += 1
+            return path
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as out: produce(out)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.built += 1
+        return path
+
+    def build(self):
+        if not self.enabled: return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        assets: Dict[str, Asset] = {}
+        for entry in sorted(os.scandir(self.source_dir), key=lambda e: e.name):
+            if entry.is_file() and not entry.name.startswith(".") and entry.name != INDEX:
+                asset = self._build_file(entry.path, entry.name)
+                assets[asset.name] = assets[asset.hashed_name] = asset
+        index_path = os.path.join(self.source_dir, INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f: html = _rewrite_html(f.read(), assets).encode()
+            digest = hashlib.sha256(html).hexdigest()[:12]
+            path = self._output(f"{digest}-{INDEX}", lambda out: out.write(html))
+            asset = self._build_file(path, INDEX, digest)
+            assets[INDEX] = asset
+        self.assets = assets
+        print(f"Assets do frontend: {len({a.digest for a in assets.values()})} arquivos ({self.built} variantes geradas, {self.reused} reaproveitadas).")
+
+    def _build_file(self, path: str, name: str, digest: str = None) -> Asset:
+        digest = digest or _digest(path)
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        asset = Asset(name, digest, media_type)
+        asset.add(None, None, path)
+        size = os.path.getsize(path)
+        if media_type.startswith(COMPRESSIBLE):
+            self._compress(asset, path, size)
+        elif Image is not None and media_type in IMAGE_FORMATS:
+            try: self._images(asset, path)
+            except OSError as e: print(f"Erro ao otimizar a imagem {name}: {e}")
+        return asset
+
+    def _compress(self, asset: Asset, path: str, size: int):
+        with open(path, "rb") as f: raw = f.read()
+        encoders = [("gzip", lambda out: out.write(gzip.compress(raw, 9, mtime=0)))]
+        if brotli is not None: encoders.append(("br", lambda out: out.write(brotli.compress(raw, quality=11))))
+        for encoding, produce in encoders:
+            variant = self._output(f"{asset.digest}.{encoding}", produce)
+            if os.path.getsize(variant) <= size * (1 - MIN_SAVING): asset.add(None, encoding, variant, encoding=encoding)
+
+    def _images(self, asset: Asset, path: str):
+        fmt = IMAGE_FORMATS[asset.media_type]
+        ext = os.path.splitext(asset.name)[1]
+        webp = features.check("webp")
+        with Image.open(path) as image:
+            image.load()
+            for width in [w for w in IMAGE_WIDTHS if w < image.width] + [None]:
+                def resized():
+                    if width is None: return image
+                    return image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+                def save(out, target_format):
+                    options = {"PNG": {"optimize": True}, "JPEG": {"quality": 82, "optimize": True, "progressive": True},
+                               "WEBP": {"quality": 80, "method": 4}}[target_format]
+                    resized().save(out, target_format, **options)
+                label = f"w{width}" if width else "o"
+                # No tamanho original o arquivo de origem continua sendo a versão no formato original:
+                # recomprimi-lo custa segundos na inicialização para ganhos de poucos por cento.
+                if width: asset.add(width, None, self._output(f"{asset.digest}.{label}{ext}", lambda out: save(out, fmt)))
+                if webp:
+                    variant = self._output(f"{asset.digest}.{label}.webp", lambda out: save(out, "WEBP"))
+                    asset.add(width, "webp", variant, media_type="image/webp")
+
+    def stats(self) -> Dict:
+        unique = {asset.digest: asset for asset in self.assets.values()}.values()
+        return {"enabled": self.enabled, "files": len(unique), "built": self.built, "reused": self.reused,
+                "source_bytes": sum(asset.variants[(None, None)].stat.st_size for asset in unique),
+                "brotli": brotli is not None, "pillow": Image is not None}
+
+_ATTRIBUTE = re.compile(r'\b(src|href)="([^"?#:]+)"')
+_IMG = re.compile(r"<img\b[^>]*>")
+
+def _rewrite_html(html: str, assets: Dict[str, Asset]) -> str:
+    def hashed(match):
+        asset = assets.get(match.group(2))
+        return f'{match.group(1)}="{asset.hashed_name}"' if asset else match.group(0)
+    def srcset(match):
+        tag = match.group(0)
+        src = re.search(r'\bsrc="([^"]+)"', tag)
+        asset = assets.get(src.group(1)) if src else None
+        if asset is None or not asset.widths or " sizes=" not in tag or " srcset=" in tag: return tag
+        with Image.open(asset.variants[(None, None)].path) as image: full = image.width
+        candidates = ", ".join([f"{asset.hashed_name}?w={w} {w}w" for w in sorted(asset.widths)] + [f"{asset.hashed_name} {full}w"])
+        return tag.replace(src.group(0), f'{src.group(0)} srcset="{candidates}"', 1)
+    html = _ATTRIBUTE.sub(hashed, html)
+    return _IMG.sub(srcset, html) if Image is not None else html
+
+assets = AssetPipeline(FRONTEND_DIR, CACHE_DIR)
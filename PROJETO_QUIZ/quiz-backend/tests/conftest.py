@@ -0,0 +1,5 @@
+# Os módulos do backend ficam na raiz de quiz-backend, como nos benchmarks.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
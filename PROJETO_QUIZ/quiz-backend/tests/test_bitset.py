@@ -0,0 +1,21 @@
+import random
+import bitset
+
+def test_partition_matches_bit_by_bit():
+    rng = random.Random(7)
+    for size in (0, 1, 7, 8, 9, 64, 1000):
+        items = [f"q{i}" for i in range(size)]
+        bits = rng.getrandbits(size) if size else 0
+        on, off = bitset.partition(items, bits)
+        assert on == [item for i, item in enumerate(items) if bits >> i & 1]
+        assert off == [item for i, item in enumerate(items) if not bits >> i & 1]
+
+def test_partition_ignores_bits_past_the_end():
+    assert bitset.partition(["a", "b"], 0b1110) == (["b"], ["a"])
+    assert bitset.partition([], 0b1) == ([], [])
+
+def test_blobs_round_trip_and_merge():
+    assert bitset.from_blob(bitset.to_blob(0)) == 0 and bitset.from_blob(None) == 0
+    assert bitset.from_blob(bitset.blob_or(bitset.to_blob(0b101), bitset.to_blob(1 << 70))) == 0b101 | 1 << 70
+    merged = bitset.ids_union(bitset.ids_to_blob([900000, 3]), bitset.ids_to_blob([3, 42]))
+    assert bitset.ids_from_blob(merged) == {3, 42, 900000}
@@ -0,0 +1,80 @@
+# Leaderboards.get/apply com lotes versionados: fora de ordem, repetidos, perdidos e durante a leitura.
+import asyncio
+import pytest
+import leaderboard
+from leaderboard import HostLeaderboard, Leaderboards
+
+def scores(host_name, version, *deltas):
+    return {"deltas": [(player, points, host_name) for player, points in deltas], "versions": {host_name: version}}
+
+@pytest.fixture
+def db(monkeypatch):
+    # Banco falso: (linhas, versão) por anfitrião; `reads` conta as leituras e `during_read` roda no meio de uma.
+    state = {"rows": {}, "versions": {}, "reads": 0, "during_read": None}
+    async def run_read(fn, host_name):
+        state["reads"] += 1
+        rows, version = dict(state["rows"].get(host_name, {})), state["versions"].get(host_name, 0)
+        during_read = state.pop("during_read", None)
+        if during_read: during_read()
+        await asyncio.sleep(0)
+        return list(rows.items()), version
+    monkeypatch.setattr(leaderboard.database, "run_read", run_read)
+    return state
+
+def test_advance_applies_only_the_next_version():
+    board = HostLeaderboard([("ana", 10)], version=3)
+    assert board.advance(3, [("ana", 5)])
+    assert board.advance(2, [("ana", 5)])
+    assert board.scores == {"ana": 10} and board.version == 3
+    assert not board.advance(5, [("ana", 5)])
+    assert board.scores == {"ana": 10} and board.version == 3
+    assert board.advance(4, [("ana", 5), ("bia", 20)])
+    assert board.version == 4
+    assert board.page(0, 10) == [{"rank": 1, "name": "bia", "score": 20}, {"rank": 2, "name": "ana", "score": 15}]
+
+def test_apply_skips_versions_already_in_the_loaded_board(db):
+    db["rows"]["host"], db["versions"]["host"] = {"ana": 10}, 2
+    boards = Leaderboards()
+    board = asyncio.run(boards.get("host"))
+    boards.apply(scores("host", 2, ("ana", 10)))
+    boards.apply(scores("host", 1, ("ana", 7)))
+    assert board.scores == {"ana": 10}
+    boards.apply(scores("host", 3, ("ana", 1)))
+    assert board.rank_of("ana") == {"rank": 1, "name": "ana", "score": 11}
+    assert boards.reloads == 0
+
+def test_gap_drops_the_board_and_next_get_reloads(db):
+    db["rows"]["host"], db["versions"]["host"] = {"ana": 10}, 1
+    boards = Leaderboards()
+    asyncio.run(boards.get("host"))
+    boards.apply(scores("host", 3, ("ana", 5)))
+    assert boards.reloads == 1 and boards.stats()["hosts"] == 0
+    db["rows"]["host"], db["versions"]["host"] = {"ana": 20}, 3
+    board = asyncio.run(boards.get("host"))
+    assert db["reads"] == 2 and board.scores == {"ana": 20} and board.version == 3
+
+def test_events_during_load_are_replayed_in_version_order(db):
+    # A leitura vê a versão 1; os lotes 3 e 2 chegam (nessa ordem) antes de ela terminar.
+    db["rows"]["host"], db["versions"]["host"] = {"ana": 10}, 1
+    boards = Leaderboards()
+    def arrive():
+        boards.apply(scores("host", 3, ("bia", 4)))
+        boards.apply(scores("host", 2, ("ana", 1)))
+    db["during_read"] = arrive
+    board = asyncio.run(boards.get("host"))
+    assert board.scores == {"ana": 11, "bia": 4} and board.version == 3
+    assert asyncio.run(boards.get("host")) is board and db["reads"] == 1
+
+def test_gap_during_load_serves_the_read_copy_without_caching_it(db):
+    db["rows"]["host"], db["versions"]["host"] = {"ana": 10}, 1
+    boards = Leaderboards()
+    db["during_read"] = lambda: boards.apply(scores("host", 3, ("ana", 5)))
+    board = asyncio.run(boards.get("host"))
+    assert board.scores == {"ana": 10} and boards.stats()["hosts"] == 0
+    asyncio.run(boards.get("host"))
+    assert db["reads"] == 2
+
+def test_unloaded_hosts_ignore_events(db):
+    boards = Leaderboards()
+    boards.apply(scores("host", 7, ("ana", 5)))
+    assert boards.stats() == {"hosts": 0, "reloads": 0}
@@ -0,0 +1,36 @@
+# Room.events_since: o que um cliente que volta com ?since=<seq> recebe do log de patches.
+from room import EVENT_LOG_SIZE, Room
+
+def room_with_patches(count: int) -> Room:
+    room = Room("sala", "ana")
+    for _ in range(count):
+        room.seq += 1
+        room.log_state(room.seq, {"player": [{"op": "replace", "path": "/seq", "value": room.seq}]})
+    return room
+
+def test_up_to_date_client_gets_nothing():
+    assert room_with_patches(3).events_since(3) == []
+    assert Room("sala", "ana").events_since(0) == []
+
+def test_missed_patches_in_order():
+    room = room_with_patches(5)
+    assert [seq for seq, _ in room.events_since(2)] == [3, 4, 5]
+    assert [seq for seq, _ in room.events_since(0)] == [1, 2, 3, 4, 5]
+
+def test_seq_from_the_future_needs_a_snapshot():
+    assert room_with_patches(3).events_since(4) is None
+
+def test_log_no_longer_covering_the_seq():
+    room = room_with_patches(EVENT_LOG_SIZE + 10)
+    assert room.events_since(9) is None
+    assert [seq for seq, _ in room.events_since(10)] == list(range(11, EVENT_LOG_SIZE + 11))
+
+def test_full_snapshot_breaks_continuity():
+    room = room_with_patches(3)
+    room.seq += 1
+    room.log_state(room.seq, None)
+    assert room.events_since(2) is None
+    room.seq += 1
+    room.log_state(room.seq, {"player": []})
+    assert room.events_since(3) is None
+    assert [seq for seq, _ in room.events_since(4)] == [5]
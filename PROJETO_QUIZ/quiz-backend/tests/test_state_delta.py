@@ -0,0 +1,40 @@
+from state_delta import diff, snapshot
+
+def apply(doc: dict, ops: list) -> dict:
+    # Aplica add/replace/remove com caminhos JSON Pointer, como o cliente.
+    doc = snapshot(doc)
+    for op in ops:
+        *parents, last = [part.replace("~1", "/").replace("~0", "~") for part in op["path"].split("/")[1:]]
+        target = doc
+        for part in parents: target = target[part]
+        if op["op"] == "remove": del target[last]
+        else: target[last] = op["value"]
+    return doc
+
+def test_identical_states_have_no_ops():
+    state = {"players": {"ana": {"name": "ana"}}, "scores": {"ana": 3}, "turn": ["ana"]}
+    assert diff(state, snapshot(state)) == []
+
+def test_nested_add_replace_remove():
+    old = {"scores": {"ana": 1, "bia": 2}, "currentPlayer": "ana", "question": {"id": 4}}
+    new = {"scores": {"ana": 1, "bia": 5, "caio": 0}, "currentPlayer": "bia"}
+    ops = diff(old, new)
+    assert sorted(ops, key=lambda op: op["path"]) == [
+        {"op": "replace", "path": "/currentPlayer", "value": "bia"},
+        {"op": "remove", "path": "/question"},
+        {"op": "replace", "path": "/scores/bia", "value": 5},
+        {"op": "add", "path": "/scores/caio", "value": 0},
+    ]
+    assert apply(old, ops) == new
+
+def test_lists_are_replaced_whole_and_keys_escaped():
+    old = {"order": ["ana", "bia"], "a/b~c": 1}
+    new = {"order": ["bia", "ana"], "a/b~c": 2}
+    ops = diff(old, new)
+    assert {"op": "replace", "path": "/order", "value": ["bia", "ana"]} in ops
+    assert {"op": "replace", "path": "/a~1b~0c", "value": 2} in ops
+    assert apply(old, ops) == new
+
+def test_shared_subtrees_are_skipped_without_comparing():
+    shared = {"ana": {"name": "ana"}}
+    assert diff({"players": shared}, {"players": shared}) == []
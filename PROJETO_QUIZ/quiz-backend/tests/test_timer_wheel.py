@@ -0,0 +1,51 @@
+# TimerWheel: nunca dispara antes do prazo, inclusive com prazos além de uma volta da roda (rounds).
+import asyncio
+import time
+from timer_wheel import TimerWheel
+
+def run_wheel(wheel: TimerWheel, delays, wait: float):
+    # Agenda um temporizador por atraso e devolve {atraso: (prazo, instante do disparo)}.
+    fired = {}
+    async def main():
+        wheel.start()
+        for delay in delays:
+            deadline = time.monotonic() + delay
+            wheel.call_at(deadline, lambda d=delay, dl=deadline: fired.setdefault(d, (dl, time.monotonic())))
+        await asyncio.sleep(wait)
+        await wheel.stop()
+    asyncio.run(main())
+    return fired
+
+def test_never_fires_early():
+    delays = [0.0, 0.001, 0.011, 0.019, 0.02, 0.021, 0.05, 0.073]
+    fired = run_wheel(TimerWheel(tick=0.01, slots=64), delays, 0.2)
+    assert sorted(fired) == delays
+    for deadline, at in fired.values(): assert at >= deadline
+
+def test_wraps_with_rounds():
+    # 8 posições de 10 ms: uma volta é 80 ms, então 0,25 s dá três voltas antes de cair na posição.
+    wheel = TimerWheel(tick=0.01, slots=8)
+    handle = wheel.call_at(wheel._tick_time + 0.25, lambda: None)
+    assert handle.rounds == 3 and handle.slot == 25 % 8
+    handle.cancel()
+    fired = run_wheel(wheel, [0.015, 0.085, 0.25], 0.4)
+    assert sorted(fired) == [0.015, 0.085, 0.25]
+    for deadline, at in fired.values(): assert at >= deadline
+    # Sem rounds, o de 0,085 s dispararia na primeira passagem pela posição, ainda em ~5 ms.
+    assert fired[0.085][1] - fired[0.015][1] > 0.05
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=0.01, slots=16)
+    calls = []
+    async def main():
+        wheel.start()
+        cancelled = wheel.call_later(0.02, calls.append, "cancelado")
+        moved = wheel.call_later(0.02, calls.append, "reagendado")
+        cancelled.cancel()
+        wheel.reschedule(moved, 0.05)
+        await asyncio.sleep(0.03)
+        assert calls == [] and len(wheel) == 1
+        await asyncio.sleep(0.06)
+        await wheel.stop()
+    asyncio.run(main())
+    assert calls == ["reagendado"] and len(wheel) == 0
@@ -0,0 +1,97 @@
+# timer_wheel.py
+# Roda de temporizadores (hashed timer wheel) movida por uma única task para todas as salas:
+# prazos de turno, pausas de revelação e contagem regressiva. Agendar, reagendar e cancelar são O(1).
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional
+import metrics
+
+class TimerHandle:
+    __slots__ = ("wheel", "deadline", "callback", "args", "slot", "rounds", "cancelled")
+    def __init__(self, wheel: "TimerWheel", deadline: float, callback: Callable, args: tuple):
+        self.wheel, self.deadline, self.callback, self.args = wheel, deadline, callback, args
+        self.slot, self.rounds, self.cancelled = 0, 0, False
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel._slots[self.slot].pop(self, None)
+
+class TimerWheel:
+    def __init__(self, tick: float = 0.05, slots: int = 1024):
+        self.tick = tick
+        self._slots: List[Dict[TimerHandle, None]] = [{} for _ in range(slots)]
+        self._cursor = 0
+        self._tick_time = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        # Atraso entre o prazo pedido e o disparo efetivo, em segundos.
+        self.fired = 0
+        self.overshoot_total = self.overshoot_max = 0.0
+
+    def __len__(self): return sum(len(slot) for slot in self._slots)
+
+    def call_at(self, deadline: float, callback: Callable, *args) -> TimerHandle:
+        handle = TimerHandle(self, deadline, callback, args)
+        self._insert(handle)
+        return handle
+
+    def call_later(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def reschedule(self, handle: TimerHandle, delay: float) -> TimerHandle:
+        handle.cancel()
+        handle.deadline, handle.cancelled = time.monotonic() + delay, False
+        self._insert(handle)
+        return handle
+
+    def _insert(self, handle: TimerHandle):
+        ticks = max(1, math.ceil((handle.deadline - self._tick_time) / self.tick))
+        handle.slot = (self._cursor + ticks) % len(self._slots)
+        handle.rounds = (ticks - 1) // len(self._slots)
+        self._slots[handle.slot][handle] = None
+
+    def start(self):
+        if self._task is None:
+            self._tick_time = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(max(0.0, self._tick_time + self.tick - time.monotonic()))
+            # Se o loop atrasou, processa todos os ticks pendentes de uma vez.
+            while self._tick_time + self.tick <= time.monotonic():
+                self._tick_time += self.tick
+                self._cursor = (self._cursor + 1) % len(self._slots)
+                self._advance(self._slots[self._cursor])
+
+    def _advance(self, slot: Dict[TimerHandle, None]):
+        due = []
+        for handle in slot:
+            if handle.rounds: handle.rounds -= 1
+            else: due.append(handle)
+        for handle in due:
+            del slot[handle]
+            handle.cancelled = True
+            overshoot = max(0.0, time.monotonic() - handle.deadline)
+            self.fired += 1
+            self.overshoot_total += overshoot
+            self.overshoot_max = max(self.overshoot_max, overshoot)
+            metrics.timer_overshoot_seconds.observe(overshoot)
+            try:
+                result = handle.callback(*handle.args)
+                if asyncio.iscoroutine(result): asyncio.create_task(result)
+            except Exception as e:
+                print(f"Erro em temporizador: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        return {"pending": len(self), "fired": self.fired, "overshoot_max": self.overshoot_max,
+                "overshoot_avg": self.overshoot_total / self.fired if self.fired else 0.0}
+
+wheel = TimerWheel()
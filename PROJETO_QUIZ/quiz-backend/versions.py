@@ -0,0 +1,43 @@
+# versions.py
+# Carimbos de versão por recurso (ranking de um anfitrião, perguntas de um autor), avançados pelos eventos
+# de gravação do backend de salas em todos os workers. As rotas de leitura respondem 304 comparando só o
+# carimbo, sem tocar no SQLite nem reserializar o conteúdo.
+# O carimbo é um instante em segundos inteiros, estritamente crescente por recurso: serve de Last-Modified
+# exato (duas versões nunca caem no mesmo segundo). O ETag leva também um id do processo, então um ETag
+# emitido por outro worker ou antes de um reinício nunca coincide por acaso.
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, Iterable, Tuple
+
+class VersionStamps:
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.instance = uuid.uuid4().hex[:8]
+        self._stamps: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        # Versão de todo recurso sem carimbo próprio: o início do processo ou o maior carimbo descartado
+        # pelo limite de chaves. Só cresce, então nenhum recurso volta a uma versão anterior.
+        self.floor = int(time.time())
+        self.bumps = 0
+
+    def get(self, kind: str, key: str) -> int:
+        return self._stamps.get((kind, key), self.floor)
+
+    def bump(self, kind: str, keys: Iterable[str]):
+        now = int(time.time())
+        for key in keys:
+            stamp = self._stamps.pop((kind, key), self.floor)
+            self._stamps[(kind, key)] = max(now, stamp + 1)
+            self.bumps += 1
+        while len(self._stamps) > self.max_keys:
+            _, evicted = self._stamps.popitem(last=False)
+            self.floor = max(self.floor, evicted)
+
+    def headers(self, stamp: int) -> Dict[str, str]:
+        return {"ETag": f'"{self.instance}-{stamp:x}"', "Last-Modified": formatdate(stamp, usegmt=True), "Cache-Control": "no-cache"}
+
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._stamps), "bumps": self.bumps}
+
+versions = VersionStamps()
@@ -0,0 +1,43 @@
+# wire.py
+# Codecs do protocolo servidor -> cliente, negociados por conexão.
+#   json          texto JSON compacto (padrão, compatível com clientes antigos)
+#   json-deflate  JSON comprimido com deflate bruto, em frames binários: comprimido uma vez por broadcast,
+#                 em vez de uma vez por conexão como no permessage-deflate do próprio WebSocket
+#   msgpack       binário compacto (requer o pacote opcional msgpack)
+# Negociação: subprotocolo WebSocket ("quiz.json", "quiz.deflate", "quiz.msgpack") ou ?codec=.
+# Mensagens do cliente para o servidor continuam sendo texto JSON.
+import json
+import zlib
+from typing import Callable, Dict, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+Frame = Union[str, bytes]
+
+class Codec:
+    __slots__ = ("name", "subprotocol", "encode")
+    def __init__(self, name: str, subprotocol: str, encode: Callable[[dict], Frame]):
+        self.name, self.subprotocol, self.encode = name, subprotocol, encode
+
+def _json(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+def _deflate(message: dict) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(_json(message).encode()) + compressor.flush()
+
+JSON = Codec("json", "quiz.json", _json)
+CODECS: Dict[str, Codec] = {"json": JSON, "json-deflate": Codec("json-deflate", "quiz.deflate", _deflate)}
+if msgpack is not None:
+    CODECS["msgpack"] = Codec("msgpack", "quiz.msgpack", msgpack.packb)
+_BY_SUBPROTOCOL = {codec.subprotocol: codec for codec in CODECS.values()}
+
+def negotiate(websocket) -> Tuple[Codec, Optional[str]]:
+    # Usa o primeiro subprotocolo oferecido que o servidor conhece; senão ?codec=; senão JSON.
+    for offered in websocket.scope.get("subprotocols", []):
+        codec = _BY_SUBPROTOCOL.get(offered)
+        if codec: return codec, offered
+    return CODECS.get(websocket.query_params.get("codec", ""), JSON), None